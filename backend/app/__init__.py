@@ -1,2 +1,9 @@
 # This file makes the app directory a package.
-from .server import app
+# The ASGI app is only built when `app.app` is first accessed, so scripts and tools that
+# import app.models or app.database don't pay the server's startup cost.
+
+def __getattr__(name):
+    if name == "app":
+        from .server import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,20 @@
+import sys
 import uvicorn
 from app.config import Settings
 
 
 DEBUG = True
 def main():
+    if sys.argv[1:2] == ["ingest"]:
+        # Guild polling and item sync only, no web server (see app/ingest.py)
+        from app.ingest import main as ingest_main
+        ingest_main()
+        return
+    if sys.argv[1:2] == ["migrate"]:
+        # Create missing tables and apply pending schema migrations, then exit (see app/migrations.py)
+        from app.migrations import main as migrate_main
+        migrate_main()
+        return
     print(f"Running with DEBUG={DEBUG}")
     try:
         uvicorn.run("app.server:app", host="0.0.0.0", port=Settings.BACKEND_PORT, reload=DEBUG)
@@ -5,7 +5,8 @@ import logging
 
 from app import models
 from app.schemas import account_schemas
-from app.database import get_db
+from app.database import get_read_db
+from app.db_writer import db_writer
 from app.services.account_merge import AccountMergeService
 
 router = APIRouter()
@@ -14,7 +15,7 @@ logger = logging.getLogger(__name__)
 @router.get("/accounts/search", response_model=List[account_schemas.AccountSearchResult])
 async def search_accounts(
     name: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Search for accounts by name (current or historical).
@@ -49,7 +50,6 @@ async def search_accounts(
 @router.post("/accounts/merge", response_model=account_schemas.AccountMergeResponse)
 async def merge_accounts(
     payload: account_schemas.AccountMergeRequest,
-    db: Session = Depends(get_db),
     # TODO: Add authentication/authorization check here
     # current_user: models.User = Depends(get_current_user_with_role("officer"))
 ):
@@ -66,28 +66,32 @@ async def merge_accounts(
     #         detail="Only officers can merge accounts"
     #     )
     
-    success, message = AccountMergeService.merge_accounts(
-        db,
-        old_account_id=payload.old_account_id,
-        new_account_id=payload.new_account_id,
-        # merged_by=current_user.username
-    )
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=message
+    def merge(write_db: Session) -> str:
+        success, message = AccountMergeService.merge_accounts(
+            write_db,
+            old_account_id=payload.old_account_id,
+            new_account_id=payload.new_account_id,
+            # merged_by=current_user.username
         )
+        if not success:
+            # Raised inside the unit so its savepoint rolls back whatever the merge changed before failing
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=message
+            )
+        return message
+
+    message = await db_writer.submit(merge)
     
     return account_schemas.AccountMergeResponse(
-        success=success,
+        success=True,
         message=message
     )
 
 @router.get("/accounts/{account_id}", response_model=account_schemas.AccountDetail)
 async def get_account_details(
     account_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get detailed information about a specific account."""
     account = db.query(models.Account).filter(models.Account.id == account_id).first()
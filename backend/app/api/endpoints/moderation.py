@@ -5,7 +5,8 @@ import logging
 
 from app import models
 from app.schemas import moderation_schemas
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.db_writer import db_writer
 from app.services.moderation_service import ModerationService
 from app.config.moderation import MOD_ACTION_TYPES
 
@@ -35,7 +36,6 @@ def get_current_user_stub(db: Session = Depends(get_db)) -> models.User:
 @router.post("/action", response_model=moderation_schemas.ModActionResponse)
 async def create_moderation_action(
     payload: moderation_schemas.ModActionCreateRequest,
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user_stub)
 ):
     """
@@ -49,9 +49,9 @@ async def create_moderation_action(
             detail="Insufficient permissions. Officer role required."
         )
     
-    try:
+    def create_action(write_db: Session) -> moderation_schemas.ModActionResponse:
         action = ModerationService.create_mod_action(
-            db=db,
+            db=write_db,
             account_name=payload.account_name,
             action_type=payload.action_type,
             reason=payload.reason,
@@ -60,8 +60,11 @@ async def create_moderation_action(
             severity=payload.severity,
             details=payload.details
         )
-        
+        # Built inside the unit: to_dict() loads created_by/lifted_by, which can't be lazy-loaded after the commit
         return moderation_schemas.ModActionResponse(**action.to_dict())
+
+    try:
+        return await db_writer.submit(create_action)
     
     except ValueError as e:
         raise HTTPException(
@@ -78,7 +81,6 @@ async def create_moderation_action(
 @router.post("/lift", response_model=moderation_schemas.ModActionResponse)
 async def lift_moderation_action(
     payload: moderation_schemas.ModActionLiftRequest,
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user_stub)
 ):
     """
@@ -92,14 +94,16 @@ async def lift_moderation_action(
             detail="Insufficient permissions. Officer role required."
         )
     
-    try:
+    def lift_action(write_db: Session) -> moderation_schemas.ModActionResponse:
         action = ModerationService.lift_mod_action(
-            db=db,
+            db=write_db,
             mod_action_id=payload.mod_action_id,
             lifted_by_user_id=current_user.id
         )
-        
         return moderation_schemas.ModActionResponse(**action.to_dict())
+
+    try:
+        return await db_writer.submit(lift_action)
     
     except ValueError as e:
         raise HTTPException(
@@ -116,7 +120,7 @@ async def lift_moderation_action(
 @router.get("/check/{account_name}", response_model=moderation_schemas.AccountStandingResponse)
 async def check_account_standing(
     account_name: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Check if an account is banned or has restrictions.
@@ -130,7 +134,7 @@ async def get_moderation_history(
     account_name: str,
     include_expired: bool = Query(True, description="Include expired/lifted actions"),
     limit: Optional[int] = Query(None, ge=1, le=100, description="Limit number of results"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user_stub)
 ):
     """
@@ -154,7 +158,7 @@ async def get_recent_mod_actions(
     limit: int = Query(50, ge=1, le=100, description="Number of actions to return"),
     action_type: Optional[str] = Query(None, description="Filter by action type"),
     active_only: bool = Query(False, description="Only show active actions"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user_stub)
 ):
     """
@@ -197,7 +201,6 @@ async def get_action_types():
 
 @router.post("/expire-actions")
 async def expire_old_actions(
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user_stub)
 ):
     """
@@ -212,7 +215,7 @@ async def expire_old_actions(
             detail="Insufficient permissions. Admin role required."
         )
     
-    count = ModerationService.expire_old_actions(db)
+    count = await db_writer.submit(ModerationService.expire_old_actions)
     
     return {
         "message": f"Expired {count} moderation actions",
@@ -6,7 +6,9 @@ import logging
 from app import models
 from app.schemas import user_schemas
 from app.database import get_db
-from app.gw2_client import GW2Client
+from app.db_writer import db_writer
+from app.gw2_client import GW2Client, GW2RateLimitError, get_gw2_client
+from app.rate_limiter import Priority
 import httpx
 
 router = APIRouter()
@@ -25,8 +27,7 @@ async def _get_gw2_account_and_permissions(api_key: str, gw2_client: GW2Client)
     headers = {"Authorization": f"Bearer {api_key}"}
     logger.info(f"Fetching account data from: {account_url}")
     try:
-        async with httpx.AsyncClient(timeout=gw2_client.timeout) as client:
-            response = await client.get(account_url, headers=headers)
+        response = await gw2_client.request(account_url, headers=headers, authenticated=False, priority=Priority.INTERACTIVE)
         
         if response.status_code != 200:
             error_detail = "Failed to fetch account details from GW2 (non-200_STATUS_CODE)."
@@ -54,8 +55,7 @@ async def _get_gw2_account_and_permissions(api_key: str, gw2_client: GW2Client)
     token_info_url = f"{gw2_client.base_url}/tokeninfo"
     logger.info(f"Fetching token info from: {token_info_url}")
     try:
-        async with httpx.AsyncClient(timeout=gw2_client.timeout) as client:
-            response = await client.get(token_info_url, headers=headers) # headers are the same
+        response = await gw2_client.request(token_info_url, headers=headers, authenticated=False, priority=Priority.INTERACTIVE) # headers are the same
         
         if response.status_code != 200:
             error_detail = "Invalid API key or GW2 API error (non-200_STATUS_CODE for /tokeninfo)."
@@ -76,6 +76,9 @@ async def _get_gw2_account_and_permissions(api_key: str, gw2_client: GW2Client)
             api_key_label = token_data.get("name", "N/A") # This is the API key's own name/label
             logger.info(f"GW2 API /tokeninfo success. API Key Label: '{api_key_label}', Permissions: {permissions}")
             
+    except GW2RateLimitError as exc:
+        logger.error(f"GW2 API rate limited /tokeninfo: {str(exc)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="The Guild Wars 2 API is rate limiting us right now. Please try again shortly.")
     except httpx.RequestError as exc:
         logger.error(f"Error communicating with GW2 API /tokeninfo: {str(exc)}", exc_info=True)
         if not account_name: # If /account also failed
@@ -160,7 +163,7 @@ async def _get_validated_account_from_api_key(
 async def validate_api_key(
     payload: user_schemas.APIKeyValidateRequest,
     db: Session = Depends(get_db),
-    gw2_client: GW2Client = Depends(GW2Client)
+    gw2_client: GW2Client = Depends(get_gw2_client)
 ):
     account = await _get_validated_account_from_api_key(
         api_key=payload.api_key, 
@@ -177,7 +180,7 @@ async def validate_api_key(
 async def register_user(
     payload: user_schemas.UserCreateRequest,
     db: Session = Depends(get_db),
-    gw2_client: GW2Client = Depends(GW2Client)
+    gw2_client: GW2Client = Depends(get_gw2_client)
 ):
     account = await _get_validated_account_from_api_key(
         api_key=payload.api_key,
@@ -191,12 +194,21 @@ async def register_user(
         username=account.current_account_name, 
         account_id=account.id
     )
+    # Hashing happens here, outside the write queue
     new_user.set_password(payload.password)
     new_user.set_api_key(payload.api_key)
     # Consider setting default roles: new_user.roles = ["member"]
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    def create_user(write_db: Session) -> models.User:
+        # Re-checked inside the write queue: two registrations for one account may both have passed validation
+        if write_db.query(models.User).filter(models.User.account_id == new_user.account_id).first():
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A user account already exists for '{new_user.username}'."
+            )
+        write_db.add(new_user)
+        write_db.flush()
+        write_db.refresh(new_user)
+        return new_user
 
-    return new_user 
\ No newline at end of file
+    return await db_writer.submit(create_user) 
\ No newline at end of file
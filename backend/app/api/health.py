@@ -1,12 +1,22 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_read_db
 from app.models.guild import Guild
+from app.gw2_client import get_gw2_client
+from app.services.missing_item_cache import missing_item_cache
+from app.services.item_blob_catalog import item_blob_catalog
+from app.services.item_search_index import item_search_index
+from app.services.guild_poller import guild_poller
+from app.services.warmup import database_warmup
+from app.services.ingest_lease import ingest_leases
+from app.services.db_maintenance import database_maintenance
+from app.db_writer import db_writer
 
 router = APIRouter()
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: Session = Depends(get_read_db)):
     """Check service health and database status"""
     try:
         # Check if database has guilds (indicating warmup is complete)
@@ -16,10 +26,28 @@ async def health_check(db: Session = Depends(get_db)):
             "database": {
                 "status": "warmed" if guild_count > 0 else "initializing",
                 "guild_count": guild_count
-            }
+            },
+            "ready": database_warmup.ready,
+            "warmup": database_warmup.status,
+            "guild_poller": guild_poller.stats(),
+            "ingest_leases": ingest_leases.stats(),
+            "db_writer": db_writer.stats(),
+            "db_maintenance": database_maintenance.stats(),
+            "gw2_rate_limiter": get_gw2_client().rate_limiter.stats(),
+            "gw2_response_cache": get_gw2_client().cache.stats() if get_gw2_client().cache else None,
+            "missing_item_cache": missing_item_cache.stats(),
+            "item_blob_catalog": item_blob_catalog.stats(),
+            "item_search_index": item_search_index.stats()
         }
     except Exception as e:
         return {
             "status": "unhealthy",
             "error": str(e)
-        } 
\ No newline at end of file
+        }
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the startup warmup has caught every guild up, 503 before that"""
+    if not database_warmup.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "warmup": database_warmup.status})
+    return {"ready": True, "warmup": database_warmup.status}
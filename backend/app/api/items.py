@@ -1,144 +1,177 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 import logging
-import httpx
 import asyncio
-from sqlalchemy.exc import IntegrityError
+import json
 
-from app.database import get_db
+from app.config import Settings
+from app.database import get_async_db
+from app.db_writer import db_writer
 from app.models.item import Item
+from app.gw2_client import get_gw2_client, GW2RateLimitError
+from app.rate_limiter import Priority
+from app.services.missing_item_cache import missing_item_cache
+from app.services.item_catalog_sync import item_catalog_sync
+from app.services.item_blob_catalog import item_blob_catalog
+from app.services.item_search_index import item_search_index
+from app.models.user import User
+from app.api.deps import get_current_superuser
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# GW2 API configuration
-GW2_API_BASE = "https://api.guildwars2.com/v2"
-TIMEOUT = httpx.Timeout(30.0, connect=10.0)  # 30s read timeout, 10s connect timeout
-
 # --- New global variables for Future-based synchronization ---
 item_futures = {}  # Stores asyncio.Future for item_ids currently being fetched/stored
 item_futures_lock = asyncio.Lock() # Protects access to item_futures
 # ---
 
-async def fetch_item_from_api(item_id: int) -> Optional[dict]:
-    """Fetch item data from the GW2 API"""
-    url = f"{GW2_API_BASE}/items/{item_id}"
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        response = await client.get(url)
-        if response.status_code == 404:
-            return None
-        response.raise_for_status()
-        return response.json()
-
-def create_item_from_api_data(api_data: dict) -> Item:
-    """Create an Item model instance from GW2 API data"""
-    # Extract base fields
-    base_fields = {
-        "id": api_data["id"],
-        "name": api_data["name"],
-        "description": api_data.get("description"),
-        "type": api_data["type"],
-        "level": api_data["level"],
-        "rarity": api_data["rarity"],
-        "vendor_value": api_data["vendor_value"],
-        "game_types": api_data.get("game_types", []),
-        "flags": api_data.get("flags", []),
-        "restrictions": api_data.get("restrictions", [])
-    }
-    
-    # Move all other fields to details
-    details = dict(api_data)
-    for field in base_fields.keys():
-        details.pop(field, None)
-    
-    return Item(
-        **base_fields,
-        details=details
-    )
+DB_IN_CHUNK = 900  # Stay under SQLite's bound-parameter limit on older builds
 
-async def _get_or_create_item_from_db(item_id: int, db: Session) -> Item:
+async def fetch_items_from_api(item_ids: List[int], priority: Priority = Priority.INTERACTIVE) -> Dict[int, dict]:
+    """Fetch many items from the GW2 API. IDs the API doesn't know are absent from the result."""
+    try:
+        return await get_gw2_client().get_items(item_ids, priority=priority)
+    except GW2RateLimitError as e:
+        raise HTTPException(status_code=503, detail=f"GW2 API rate limit reached, retry in {e.retry_after:.0f}s")
+
+async def _query_items(db: AsyncSession, item_ids: List[int]) -> Dict[int, Item]:
+    """Load the given items from the DB with as few IN queries as possible"""
+    found = {}
+    for i in range(0, len(item_ids), DB_IN_CHUNK):
+        chunk = item_ids[i:i + DB_IN_CHUNK]
+        found.update({item.id: item for item in (await db.scalars(select(Item).where(Item.id.in_(chunk)))).all()})
+    return found
+
+def _store_items(db: Session, api_items: List[dict], missing_ids: List[int]) -> Dict[int, Item]:
     """
-    Core logic: Gets an item from DB. If not found, fetches from API, stores in DB,
-    and ensures only one concurrent operation per item_id using a Future.
-    Returns the persisted Item model instance. Raises HTTPException or other exceptions on failure.
+    Insert newly fetched items and negatively cache the IDs the API didn't know, then
+    return the items as stored. A unit of work for the database writer. Rows another
+    request inserted in the meantime are kept rather than overwritten.
     """
-    # 1. Initial DB check (non-critical section for lock)
-    item_model = db.query(Item).filter(Item.id == item_id).first()
-    if item_model:
-        return item_model
-
-    # 2. Future management for fetching/creating
-    active_future: asyncio.Future
-    is_leader = False
-
+    if api_items:
+        stmt = sqlite_insert(Item.__table__).on_conflict_do_nothing(index_elements=["id"])
+        db.execute(stmt, [Item.columns_from_api_response(api_data) for api_data in api_items])
+    missing_item_cache.record_missing(db, missing_ids)
+    item_ids = [api_data["id"] for api_data in api_items]
+    stored = {}
+    for i in range(0, len(item_ids), DB_IN_CHUNK):
+        chunk = item_ids[i:i + DB_IN_CHUNK]
+        stored.update({item.id: item for item in db.query(Item).filter(Item.id.in_(chunk))})
+    return stored
+
+async def _get_or_create_items_from_db(item_ids: List[int], db: AsyncSession) -> Dict[int, Union[Item, Exception]]:
+    """
+    Resolve items from the DB, fetching the ones it lacks from the API.
+    All DB hits come from one IN query; misses are fetched through the multi-ID endpoint
+    and stored by the database writer in one unit of work. An ID that another request is
+    already fetching (see item_futures) is awaited rather than fetched twice.
+    Returns a map of item ID to Item, or to the exception that item failed with.
+    """
+    results: Dict[int, Union[Item, Exception]] = dict(await _query_items(db, item_ids))
+    misses = [item_id for item_id in item_ids if item_id not in results]
+    if not misses:
+        return results
+
+    known_missing = await db.run_sync(missing_item_cache.known_missing, misses)
+    for item_id in known_missing:
+        results[item_id] = HTTPException(status_code=404, detail=f"Item {item_id} not found in API")
+    misses = [item_id for item_id in misses if item_id not in known_missing]
+    if not misses:
+        return results
+
+    led: Dict[int, asyncio.Future] = {}
+    followed: Dict[int, asyncio.Future] = {}
     async with item_futures_lock:
-        if item_id in item_futures:
-            active_future = item_futures[item_id]
-        else:
-            active_future = asyncio.Future()
-            item_futures[item_id] = active_future
-            is_leader = True
-    
-    if is_leader:
+        for item_id in misses:
+            if item_id in item_futures:
+                followed[item_id] = item_futures[item_id]
+            else:
+                led[item_id] = asyncio.Future()
+                item_futures[item_id] = led[item_id]
+
+    if led:
+        logger.info(f"Leader for {len(led)} items: fetching from API (following {len(followed)} in-flight fetches).")
         try:
-            logger.info(f"Leader for item {item_id}: Fetching from API and storing.")
-            api_data = await fetch_item_from_api(item_id)
-            if not api_data:
-                exc = HTTPException(status_code=404, detail=f"Item {item_id} not found in API")
-                active_future.set_exception(exc)
-                raise exc
-
-            persisted_item = create_item_from_api_data(api_data)
-            db.add(persisted_item)
-            try:
-                db.commit()
-                db.refresh(persisted_item)
-                active_future.set_result(persisted_item)
-                return persisted_item
-            except IntegrityError:
-                db.rollback()
-                logger.warning(f"Leader for item {item_id} encountered IntegrityError during commit. Re-querying from DB.")
-                item_after_conflict = db.query(Item).filter(Item.id == item_id).first()
-                if item_after_conflict:
-                    active_future.set_result(item_after_conflict)
-                    return item_after_conflict
+            api_items = await fetch_items_from_api(list(led))
+            fetched = [api_items[item_id] for item_id in led if item_id in api_items]
+            not_found = [item_id for item_id in led if item_id not in api_items]
+            persisted = await db_writer.submit(lambda write_db: _store_items(write_db, fetched, not_found))
+            item_search_index.add_items(persisted.values())
+            for item_id, future in led.items():
+                if item_id in persisted:
+                    future.set_result(persisted[item_id])
                 else:
-                    exc = HTTPException(status_code=500, detail=f"DB conflict for item {item_id}, but item not retrievable post-conflict.")
-                    active_future.set_exception(exc)
-                    raise exc
+                    future.set_exception(HTTPException(status_code=404, detail=f"Item {item_id} not found in API"))
         except Exception as e:
-            if not active_future.done():
-                active_future.set_exception(e)
-            raise
+            for future in led.values():
+                if not future.done():
+                    future.set_exception(e)
         finally:
             async with item_futures_lock:
-                if item_id in item_futures and item_futures[item_id] is active_future:
-                    del item_futures[item_id]
-    else:
-        # Follower awaits the future resolved by the leader
-        logger.info(f"Follower for item {item_id}: Awaiting leader's result.")
+                for item_id, future in led.items():
+                    if item_futures.get(item_id) is future:
+                        del item_futures[item_id]
+
+    for item_id, future in {**led, **followed}.items():
         try:
-            awaited_item_model = await active_future
-            return awaited_item_model
+            results[item_id] = await future
         except Exception as e:
-            logger.error(f"Follower for item {item_id} received error from future: {type(e).__name__} - {str(e)}")
-            # Re-raise the exception so the caller (endpoint handler) can process it
-            raise
+            results[item_id] = e
+    return results
+
+@router.get("/items/sync")
+async def get_item_catalog_sync_status():
+    """Progress of the current (or last) item catalog sync"""
+    return {"running": item_catalog_sync.running, **item_catalog_sync.status}
+
+@router.post("/items/sync", status_code=202)
+async def start_item_catalog_sync(current_user: User = Depends(get_current_superuser)):
+    """Start a full item catalog sync in the background"""
+    if not item_catalog_sync.start():
+        raise HTTPException(status_code=409, detail="An item catalog sync is already running")
+    logger.info(f"Item catalog sync started by {current_user.username}")
+    return {"running": True, **item_catalog_sync.status}
+
+@router.get("/items/search")
+async def search_items(
+    query: str,
+    limit: int = 50,
+    rarity: Optional[str] = None,
+    type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search items by name. Exact and prefix matches rank first; optionally filter by rarity and type."""
+    logger.info(f"Searching items with query: {query}")
+
+    await item_search_index.ensure_built()
+    item_ids = item_search_index.search(query, limit=limit, rarity=rarity, item_type=type)
+    items = await _query_items(db, item_ids)
+
+    return [items[item_id].to_dict() for item_id in item_ids if item_id in items]
 
 @router.get("/items/{item_id}")
-async def get_item(item_id: int, db: Session = Depends(get_db)):
+async def get_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a single item by ID. Fetches from API and stores if not found."""
     logger.info(f"Endpoint /items/{item_id} requested.")
-    # _get_or_create_item_from_db can raise HTTPException or other errors.
-    # FastAPI will handle these appropriately (e.g., return 404, 500).
-    item_model = await _get_or_create_item_from_db(item_id, db)
-    return item_model.to_dict()
+    # Serve the stored API JSON straight from the memory-mapped catalog when it has the item
+    if Settings.ITEM_BLOB_CATALOG_ENABLED:
+        blob = item_blob_catalog.get(item_id)
+        if blob is not None:
+            return Response(content=blob, media_type="application/json")
+    # An HTTPException (e.g. 404, 503) or any other error is raised for FastAPI to handle
+    result = (await _get_or_create_items_from_db([item_id], db))[item_id]
+    if isinstance(result, Exception):
+        raise result
+    return result.to_dict()
 
 @router.get("/items")
-async def get_items(ids: str = None, db: Session = Depends(get_db)):
+async def get_items(ids: str = None, db: AsyncSession = Depends(get_async_db)):
     """Get multiple items by IDs. Fetches from API and stores if not found."""
     if not ids:
         raise HTTPException(status_code=400, detail="No item IDs provided")
@@ -154,24 +187,29 @@ async def get_items(ids: str = None, db: Session = Depends(get_db)):
 
     logger.info(f"Endpoint /items?ids=... requested for {len(requested_item_ids_ordered)} items (unique: {len(unique_item_ids)}).")
 
-    # Create tasks for fetching each unique item
-    tasks_for_unique_ids = [_get_or_create_item_from_db(uid, db) for uid in unique_item_ids]
-    
-    # Execute all tasks concurrently and get results (Item models or exceptions)
-    results_for_unique_ids = await asyncio.gather(*tasks_for_unique_ids, return_exceptions=True)
-
-    # Map results back to unique IDs for easy lookup
-    processed_results_map = {uid: result for uid, result in zip(unique_item_ids, results_for_unique_ids)}
+    # Raw JSON from the memory-mapped catalog first; only what it lacks goes to the DB/API
+    catalog_blobs = {}
+    if Settings.ITEM_BLOB_CATALOG_ENABLED:
+        for uid in unique_item_ids:
+            blob = item_blob_catalog.get(uid)
+            if blob is not None:
+                catalog_blobs[uid] = blob
+    remaining_item_ids = [uid for uid in unique_item_ids if uid not in catalog_blobs]
+
+    # Resolve the remaining unique IDs at once (Item models or exceptions, keyed by ID)
+    processed_results_map = await _get_or_create_items_from_db(remaining_item_ids, db)
         
     # Build the final list in the originally requested order
     final_response_list = []
     for req_id in requested_item_ids_ordered:
         result = processed_results_map.get(req_id)
         
-        if isinstance(result, Item):
+        if req_id in catalog_blobs:
+            final_response_list.append(catalog_blobs[req_id])
+        elif isinstance(result, Item):
             final_response_list.append(result.to_dict())
         elif isinstance(result, HTTPException) and result.status_code == 404:
-            logger.info(f"Item {req_id} not found (404) for bulk request via _get_or_create_item_from_db.")
+            logger.info(f"Item {req_id} not found (404) for bulk request via _get_or_create_items_from_db.")
             final_response_list.append(None)
         elif isinstance(result, Exception): # Includes other HTTPErrors or any other exception
             logger.error(f"Error processing item {req_id} in bulk: {type(result).__name__} - {str(result)}. Returning None for this item.")
@@ -179,20 +217,10 @@ async def get_items(ids: str = None, db: Session = Depends(get_db)):
         else: # Should ideally not happen if gather returns items or exceptions
             logger.warning(f"Unexpected result type for item {req_id} in bulk: {type(result)}. Returning None.")
             final_response_list.append(None)
-            
-    return final_response_list
 
-@router.get("/items/search")
-async def search_items(
-    query: str,
-    limit: int = 50,
-    db: Session = Depends(get_db)
-):
-    """Search items by name"""
-    logger.info(f"Searching items with query: {query}")
-    
-    items = db.query(Item).filter(
-        Item.name.ilike(f"%{query}%")
-    ).limit(limit).all()
-    
-    return [item.to_dict() for item in items] 
\ No newline at end of file
+    # Catalog blobs are already JSON, so assemble the array as bytes instead of re-serializing them
+    body = b",".join(
+        entry if isinstance(entry, memoryview) else json.dumps(entry).encode("utf-8")
+        for entry in final_response_list
+    )
+    return Response(content=b"[" + body + b"]", media_type="application/json")
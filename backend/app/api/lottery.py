@@ -4,11 +4,10 @@ from sqlalchemy import and_, func
 from datetime import datetime, timedelta
 import random
 from typing import List, Optional
-from sqlalchemy.exc import OperationalError
-import time
 import logging
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.db_writer import db_writer
 from app.models.guild_lottery import LotteryEntry, LotteryWinner
 from app.models.guild_membership import GuildMembership
 from app.models.account import Account
@@ -30,8 +29,6 @@ OFFICER_RANKS = [
 ]  # Ranks that cannot participate
 
 GOLD_TO_COPPER = 10000  # 1 gold = 10000 copper
-MAX_RETRIES = 3  # Maximum number of retries for database operations
-RETRY_DELAY = 0.5  # Delay between retries in seconds
 
 def get_current_week():
     """Get the current ISO week number and year"""
@@ -52,13 +49,16 @@ def is_officer_user(user: User, db: Session) -> bool:
         return False
     return is_officer(db, user.account.id)
 
-async def process_lottery_entry(
+def process_lottery_entry(
+    db: Session,
     guild_id: str,
     account_id: int,
-    copper_amount: int,
-    db: Session
+    copper_amount: int
 ) -> Optional[LotteryEntry]:
-    """Process a lottery entry from a stash deposit with retry logic"""
+    """
+    Add lots for a stash deposit. A unit of work for the database writer: it runs on the
+    writer's session, which serializes it against every other write, and doesn't commit.
+    """
     
     # Check if account is an officer
     if is_officer(db, account_id):
@@ -74,61 +74,37 @@ async def process_lottery_entry(
     if new_lots < 1:
         return None  # Skip entries less than 1 gold
 
-    retries = 0
-    last_error = None
+    # Get or create entry for this week
+    entry = db.query(LotteryEntry).filter(
+        LotteryEntry.account_id == account_id,
+        LotteryEntry.week_number == week_number,
+        LotteryEntry.year == year
+    ).first()
     
-    while retries < MAX_RETRIES:
-        try:
-            # Get or create entry for this week
-            entry = db.query(LotteryEntry).filter(
-                LotteryEntry.account_id == account_id,
-                LotteryEntry.week_number == week_number,
-                LotteryEntry.year == year
-            ).with_for_update().first()  # Lock the row
-            
-            if entry:
-                # Check if adding new lots would exceed maximum
-                if entry.lots + new_lots > 10:
-                    return None  # Skip if would exceed maximum
-                entry.lots += new_lots
-                entry.updated_at = datetime.utcnow()
-            else:
-                if new_lots > 10:
-                    new_lots = 10  # Cap at maximum
-                entry = LotteryEntry(
-                    guild_id=guild_id,  # Record which guild the entry came from
-                    account_id=account_id,
-                    week_number=week_number,
-                    year=year,
-                    lots=new_lots
-                )
-                db.add(entry)
-            
-            db.commit()
-            return entry
-            
-        except OperationalError as e:
-            last_error = e
-            if "database is locked" in str(e):
-                retries += 1
-                if retries < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * (2 ** retries))  # Exponential backoff
-                    continue
-            db.rollback()
-            raise
-        except Exception as e:
-            db.rollback()
-            raise
-
-    if last_error:
-        logger.error(f"Failed to process lottery entry after {MAX_RETRIES} retries: {last_error}")
-        raise last_error
-
-    return None
+    if entry:
+        # Check if adding new lots would exceed maximum
+        if entry.lots + new_lots > 10:
+            return None  # Skip if would exceed maximum
+        entry.lots += new_lots
+        entry.updated_at = datetime.utcnow()
+    else:
+        if new_lots > 10:
+            new_lots = 10  # Cap at maximum
+        entry = LotteryEntry(
+            guild_id=guild_id,  # Record which guild the entry came from
+            account_id=account_id,
+            week_number=week_number,
+            year=year,
+            lots=new_lots
+        )
+        db.add(entry)
+    
+    db.flush()
+    return entry
 
 @router.get("/entries", response_model=List[LotteryEntryResponse])
 async def get_current_entries(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all entries for the current week"""
@@ -151,68 +127,49 @@ async def draw_winner(
         raise HTTPException(status_code=403, detail="Only officers can draw winners")
 
     week_number, year = get_current_week()
-    
-    retries = 0
-    last_error = None
-    
-    while retries < MAX_RETRIES:
-        try:
-            # Get all entries for the week with row locks
-            entries = db.query(LotteryEntry).filter(
-                LotteryEntry.week_number == week_number,
-                LotteryEntry.year == year
-            ).with_for_update().all()
-            
-            if not entries:
-                raise HTTPException(status_code=404, detail="No entries found for current week")
-            
-            # Create weighted list based on number of lots
-            weighted_entries = []
-            for entry in entries:
-                weighted_entries.extend([entry] * entry.lots)
-            
-            # Draw winner
-            winning_entry = random.choice(weighted_entries)
-            
-            # Calculate prize (90% of total pot)
-            total_lots = sum(entry.lots for entry in entries)
-            total_gold = total_lots  # 1 lot = 1 gold
-            prize_gold = int(total_gold * 0.9)  # 90% of pot
-            prize_copper = prize_gold * GOLD_TO_COPPER
-            
-            # Record winner
-            winner = LotteryWinner(
-                guild_id=winning_entry.guild_id,  # Record which guild the winning entry came from
-                account_id=winning_entry.account_id,
-                week_number=week_number,
-                year=year,
-                prize_amount=prize_copper
-            )
-            db.add(winner)
-            db.commit()
-            
-            return winner
-            
-        except OperationalError as e:
-            last_error = e
-            if "database is locked" in str(e):
-                retries += 1
-                if retries < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * (2 ** retries))  # Exponential backoff
-                    continue
-            db.rollback()
-            raise
-        except Exception as e:
-            db.rollback()
-            raise
 
-    if last_error:
-        logger.error(f"Failed to draw winner after {MAX_RETRIES} retries: {last_error}")
-        raise last_error
+    def draw(write_db: Session) -> LotteryWinner:
+        entries = write_db.query(LotteryEntry).filter(
+            LotteryEntry.week_number == week_number,
+            LotteryEntry.year == year
+        ).all()
+        
+        if not entries:
+            raise HTTPException(status_code=404, detail="No entries found for current week")
+        
+        # Create weighted list based on number of lots
+        weighted_entries = []
+        for entry in entries:
+            weighted_entries.extend([entry] * entry.lots)
+        
+        # Draw winner
+        winning_entry = random.choice(weighted_entries)
+        
+        # Calculate prize (90% of total pot)
+        total_lots = sum(entry.lots for entry in entries)
+        total_gold = total_lots  # 1 lot = 1 gold
+        prize_gold = int(total_gold * 0.9)  # 90% of pot
+        prize_copper = prize_gold * GOLD_TO_COPPER
+        
+        # Record winner
+        winner = LotteryWinner(
+            guild_id=winning_entry.guild_id,  # Record which guild the winning entry came from
+            account_id=winning_entry.account_id,
+            week_number=week_number,
+            year=year,
+            prize_amount=prize_copper
+        )
+        write_db.add(winner)
+        write_db.flush()
+        write_db.refresh(winner)
+        return winner
+
+    # Drawn inside the write queue, so no deposit can land between reading the entries and recording the winner
+    return await db_writer.submit(draw)
 
 @router.get("/stats", response_model=LotteryStats)
 async def get_lottery_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get statistics about the lottery"""
@@ -248,36 +205,17 @@ async def mark_winner_paid(
     if not is_officer_user(current_user, db):
         raise HTTPException(status_code=403, detail="Only officers can mark winners as paid")
 
-    retries = 0
-    last_error = None
-    
-    while retries < MAX_RETRIES:
-        try:
-            winner = db.query(LotteryWinner).filter(
-                LotteryWinner.id == winner_id
-            ).with_for_update().first()
-            
-            if not winner:
-                raise HTTPException(status_code=404, detail="Winner not found")
-            
-            winner.paid_out = True
-            winner.paid_at = datetime.utcnow()
-            db.commit()
-            return winner
-            
-        except OperationalError as e:
-            last_error = e
-            if "database is locked" in str(e):
-                retries += 1
-                if retries < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * (2 ** retries))  # Exponential backoff
-                    continue
-            db.rollback()
-            raise
-        except Exception as e:
-            db.rollback()
-            raise
-
-    if last_error:
-        logger.error(f"Failed to mark winner as paid after {MAX_RETRIES} retries: {last_error}")
-        raise last_error 
\ No newline at end of file
+    def mark_paid(write_db: Session) -> LotteryWinner:
+        winner = write_db.query(LotteryWinner).filter(
+            LotteryWinner.id == winner_id
+        ).first()
+        
+        if not winner:
+            raise HTTPException(status_code=404, detail="Winner not found")
+        
+        winner.paid_out = True
+        winner.paid_at = datetime.utcnow()
+        write_db.flush()
+        return winner
+
+    return await db_writer.submit(mark_paid)
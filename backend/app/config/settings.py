@@ -1,5 +1,6 @@
+import os
 import secrets
-from typing import Literal
+from typing import Dict, Literal, Optional
 
 
 class Settings:
@@ -19,6 +20,88 @@ class Settings:
     ]
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
+    # GW2 API client
+    GW2_API_BASE: str = "https://api.guildwars2.com/v2"
+    GW2_HTTP2: bool = True  # Only used when the optional 'h2' package is installed
+    GW2_MAX_CONNECTIONS: int = 20
+    GW2_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    GW2_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept open
+
+    # GW2 API rate limiting (300 request burst, 5 requests/second refill)
+    GW2_RATE_LIMIT_BUCKET: int = 300
+    GW2_RATE_LIMIT_REFILL: float = 5.0
+    GW2_MAX_RETRIES: int = 3  # Retries after a 429 before giving up
+    GW2_BACKOFF_BASE: float = 1.0  # seconds, doubled on every retry and jittered
+
+    # GW2 API response cache (honors Cache-Control max-age, revalidates with ETag/Last-Modified)
+    GW2_CACHE_ENABLED: bool = True
+    GW2_CACHE_MAX_ENTRIES: int = 2000
+    GW2_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    GW2_CACHE_DISK_PATH: Optional[str] = "/app/data/http_cache"  # None keeps the cache in memory only
+    GW2_CACHE_DISK_MAX_ENTRIES: int = 10000
+
+    # Guild polling: seconds before each part of a guild is re-fetched ("core" includes the emblem)
+    GUILD_REFRESH_TIERS: Dict[str, int] = {
+        "logs": 60,
+        "core": 15 * 60,
+        "members": 60 * 60,
+        "ranks": 24 * 60 * 60,
+    }
+    GUILD_POLLER_ENABLED: bool = True  # Poll tracked guilds in the background instead of on request
+    GUILD_POLL_CONCURRENCY: int = 2  # Guilds updated at the same time
+    GUILD_POLL_JITTER: float = 0.1  # +/- fraction applied to every poll interval
+    GUILD_POLL_START_SPREAD: float = 10.0  # seconds over which the first polls are spread
+    GUILD_POLL_MIN_LOG_INTERVAL: float = 15.0  # Fastest log polling for busy guilds
+    GUILD_POLL_BUSY_FRACTION: float = 0.5  # Poll faster when a poll returns this share of a full log page
+    GUILD_REFRESH_REQUEST_INTERVAL: float = 5.0  # seconds between checks for force_refresh requests from the API
+    # "embedded": the web server also polls guilds and syncs items. "external": it only serves
+    # requests and `python -m app ingest` runs the ingest in its own process.
+    INGEST_MODE: Literal["embedded", "external"] = os.environ.get("INGEST_MODE", "embedded")
+    INGEST_LEASE_ENABLED: bool = True  # With several workers, only the lease owner polls a guild / syncs items
+    INGEST_LEASE_TTL: int = 60  # seconds a lease stays valid without a heartbeat (failover time)
+    INGEST_LEASE_HEARTBEAT: int = 15  # seconds between lease renewals
+    WARMUP_FORCE_FULL_REFRESH: bool = False  # Startup warmup re-fetches everything, not just guilds missing from the DB
+
+    # Database write queue (app/db_writer.py)
+    WRITE_QUEUE_MAX_BATCH: int = 64  # Units of work applied per commit
+    WRITE_QUEUE_MAX_WAIT: float = 0.005  # seconds the writer waits for more units before committing
+
+    # SQLite pragmas applied to every connection; read-only connections add SQLITE_READ_PRAGMAS on top
+    SQLITE_PRAGMAS: Dict[str, object] = {
+        "journal_mode": "WAL",
+        "busy_timeout": 30000,  # ms
+        "synchronous": "NORMAL",
+        "cache_size": -16 * 1024,  # negative: KiB
+        "temp_store": "MEMORY",
+        "journal_size_limit": 64 * 1024 * 1024,  # WAL is truncated back to this after a checkpoint
+    }
+    SQLITE_READ_PRAGMAS: Dict[str, object] = {
+        "query_only": "ON",  # Any write on a read connection is an error
+        "cache_size": -64 * 1024,
+        "mmap_size": 256 * 1024 * 1024,
+    }
+    # Only take effect when the database file is created (set before the first table)
+    SQLITE_PAGE_SIZE: int = 4096
+    SQLITE_AUTO_VACUUM: Literal["NONE", "FULL", "INCREMENTAL"] = "INCREMENTAL"
+
+    # Database maintenance (app/services/db_maintenance.py), seconds between runs
+    DB_MAINTENANCE_ENABLED: bool = True
+    DB_CHECKPOINT_INTERVAL: int = 5 * 60  # wal_checkpoint(TRUNCATE)
+    DB_CHECKPOINT_BUSY_TIMEOUT: float = 0.2  # seconds the TRUNCATE step waits for readers/writers before giving up
+    DB_OPTIMIZE_INTERVAL: int = 60 * 60  # PRAGMA optimize (a full ANALYZE the first time)
+    DB_VACUUM_INTERVAL: int = 24 * 60 * 60  # incremental_vacuum
+    DB_VACUUM_MAX_PAGES: int = 10000  # Free pages returned to the OS per run
+    DB_VACUUM_BUSY_TIMEOUT: float = 5.0  # seconds the vacuum waits for the write lock before giving up
+    DB_MAINTENANCE_RETRY_INTERVAL: int = 30  # seconds until a failed job (or unfinished checkpoint) is retried
+
+    # Items
+    MISSING_ITEM_TTL_HOURS: int = 24  # How long an ID the API reported as unknown stays negatively cached
+    ITEM_CATALOG_SYNC_ENABLED: bool = True  # Mirror the full /v2/items catalog in the background
+    ITEM_CATALOG_SYNC_INTERVAL_HOURS: int = 24  # Later runs only fetch IDs we don't have yet
+    ITEM_BLOB_CATALOG_ENABLED: bool = True  # Serve items from the memory-mapped catalog when it has them
+    ITEM_BLOB_CATALOG_PATH: str = "/app/data/items.catalog"  # Rebuilt after each catalog sync
+    ITEM_SEARCH_INDEX_CHECK_INTERVAL: float = 30.0  # seconds between checks for items stored by other processes
+
 
 class Constants:
     pass
\ No newline at end of file
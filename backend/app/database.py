@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 import logging
+import threading
+
+from app.config import Settings
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -11,48 +14,221 @@ logger = logging.getLogger(__name__)
 DATA_DIR = "/app/data"
 DB_FILE = os.path.join(DATA_DIR, "guild.db")
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_FILE}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{DB_FILE}"
 
-logger.info(f"Database URL: {SQLALCHEMY_DATABASE_URL}")
-
-try:
-    # Ensure the data directory exists
-    os.makedirs(DATA_DIR, exist_ok=True)
-    logger.info(f"Using data directory: {os.path.abspath(DATA_DIR)}")
-
-    # Create SQLite engine with better configuration for concurrent access
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={
-            "check_same_thread": False,
-            "timeout": 30.0  # 30 second timeout for locks
-        },
-        pool_pre_ping=True,  # Verify connections before using them
-        pool_size=5,  # Connection pool size
-        max_overflow=10  # Maximum overflow connections
-    )
+# Create Base class
+Base = declarative_base()
+
+# Engines and session factories are created on first use (see __getattr__ below), so importing
+# this module, or the models, neither touches the data directory nor loads the async driver
+ENGINE_NAMES = {
+    "engine", "SessionLocal",
+    "write_engine", "WriterSessionLocal",
+    "read_engine", "ReadSessionLocal",
+    "async_engine", "AsyncSessionLocal",
+}
+_engines_lock = threading.Lock()
+_engines_created = False
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+# WAL mode for concurrent access, plus the rest of the configured pragma profile
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    apply_pragmas(dbapi_connection, Settings.SQLITE_PRAGMAS)
+
+def set_writer_pragma(dbapi_connection, connection_record):
+    set_sqlite_pragma(dbapi_connection, connection_record)
+    dbapi_connection.isolation_level = None
+
+def begin_immediate(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def set_reader_pragma(dbapi_connection, connection_record):
+    apply_pragmas(dbapi_connection, {**Settings.SQLITE_PRAGMAS, **Settings.SQLITE_READ_PRAGMAS})
+
+def _create_engines() -> None:
+    """Create every engine and session factory and publish them as module attributes"""
+    global _engines_created
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    logger.info(f"Database URL: {SQLALCHEMY_DATABASE_URL}")
+    try:
+        # Ensure the data directory exists
+        os.makedirs(DATA_DIR, exist_ok=True)
+        logger.info(f"Using data directory: {os.path.abspath(DATA_DIR)}")
+
+        # Create SQLite engine with better configuration for concurrent access
+        engine = create_engine(
+            SQLALCHEMY_DATABASE_URL, 
+            connect_args={
+                "check_same_thread": False,
+                "timeout": 30.0  # 30 second timeout for locks
+            },
+            pool_pre_ping=True,  # Verify connections before using them
+            pool_size=5,  # Connection pool size
+            max_overflow=10  # Maximum overflow connections
+        )
+        event.listen(engine, "connect", set_sqlite_pragma)
+
+        # Create SessionLocal class
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        # The single connection used by the write queue (app/db_writer.py). Transactions are begun
+        # explicitly with BEGIN IMMEDIATE so the write lock is taken up front, and the driver's own
+        # implicit transaction handling is switched off so SAVEPOINTs behave.
+        write_engine = create_engine(
+            SQLALCHEMY_DATABASE_URL,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": 30.0
+            },
+            pool_size=1,
+            max_overflow=0
+        )
+        event.listen(write_engine, "connect", set_writer_pragma)
+        event.listen(write_engine, "begin", begin_immediate)
+
+        # Objects returned from a unit of work stay readable after the writer commits
+        WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine, expire_on_commit=False)
 
-    # Enable WAL mode for better concurrent access
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
-        cursor.execute("PRAGMA synchronous=NORMAL")  # Better performance
-        cursor.close()
+        # Read-only engine for GET handlers, with its own pool so reads never wait for a
+        # connection behind ingest or other writers. pysqlite only opens a transaction for
+        # DML, so every SELECT reads a fresh WAL snapshot and no read transaction stays
+        # open long enough to hold back checkpoints.
+        read_engine = create_engine(
+            SQLALCHEMY_DATABASE_URL,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": 30.0
+            },
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10
+        )
+        event.listen(read_engine, "connect", set_reader_pragma)
+        ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
-    # Create SessionLocal class
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        # Async read-only engine for the hot read endpoints: queries run on aiosqlite's thread
+        # and are awaited, so they don't block the event loop
+        async_engine = create_async_engine(
+            ASYNC_SQLALCHEMY_DATABASE_URL,
+            connect_args={
+                "timeout": 30.0
+            },
+            poolclass=AsyncAdaptedQueuePool,  # aiosqlite would default to NullPool, reconnecting on every request
+            pool_size=5,
+            max_overflow=10
+        )
+        event.listen(async_engine.sync_engine, "connect", set_reader_pragma)
 
-    # Create Base class
-    Base = declarative_base()
-except Exception as e:
-    logger.error(f"Error initializing database: {e}")
-    raise
+        # Relationships can't be lazy-loaded on an AsyncSession, so queries eager-load what they need
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    except Exception as e:
+        logger.error(f"Error initializing database: {e}")
+        raise
+
+    globals().update(
+        engine=engine, SessionLocal=SessionLocal,
+        write_engine=write_engine, WriterSessionLocal=WriterSessionLocal,
+        read_engine=read_engine, ReadSessionLocal=ReadSessionLocal,
+        async_engine=async_engine, AsyncSessionLocal=AsyncSessionLocal,
+    )
+    _engines_created = True
+
+def ensure_engines() -> None:
+    """Create the engines if that hasn't happened yet"""
+    if not _engines_created:
+        with _engines_lock:
+            if not _engines_created:
+                _create_engines()
+
+def __getattr__(name: str):
+    # Only called for names not (yet) in the module namespace, e.g. `from app.database import engine`
+    if name in ENGINE_NAMES:
+        ensure_engines()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Dependency to get DB session
 def get_db():
+    ensure_engines()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency to get a read-only DB session, for GET handlers
+def get_read_db():
+    ensure_engines()
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get a read-only async DB session (for the hot read endpoints; writes go through app.db_writer)
+async def get_async_db():
+    ensure_engines()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Log tables the app can't run without
+EXPECTED_TABLES = [
+    "guild_logs_kick",
+    "guild_logs_invite",
+    "guild_logs_invite_decline",
+    "guild_logs_join",
+    "guild_logs_rank_change",
+    "guild_logs_stash",
+    "guild_logs_treasury",
+    "guild_logs_motd",
+    "guild_logs_upgrade",
+    "guild_logs_influence",
+    "guild_logs_mission"
+]
+
+def init_database():
+    """
+    Create any tables that don't exist yet, bring existing ones up to date with the pending
+    migrations (app/migrations.py) and check that the required tables are there. Called from
+    the app lifespan rather than at import time, so importing the package never touches the
+    database file.
+    """
+    import app.models  # noqa: F401 -- register every model on Base.metadata
+    from app.migrations import run_migrations, stamp_latest_version
+    ensure_engines()
+
+    existing_tables = set(inspect(engine).get_table_names())
+    if not existing_tables:
+        logger.info("No tables found in database, creating schema...")
+        # page_size and auto_vacuum are fixed once tables exist, and page_size can't change
+        # in WAL mode: leave WAL, rebuild the still empty file with them, and switch back
+        dbapi_connection = engine.raw_connection()
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=DELETE")
+            cursor.execute(f"PRAGMA page_size={Settings.SQLITE_PAGE_SIZE}")
+            cursor.execute(f"PRAGMA auto_vacuum={Settings.SQLITE_AUTO_VACUUM}")
+            cursor.execute("VACUUM")
+            cursor.execute(f"PRAGMA journal_mode={Settings.SQLITE_PRAGMAS['journal_mode']}")
+            cursor.close()
+        finally:
+            dbapi_connection.close()
+    Base.metadata.create_all(bind=engine)
+    if existing_tables:
+        run_migrations()
+    else:
+        stamp_latest_version()
+
+    tables = set(inspect(engine).get_table_names())
+    missing_tables = [table for table in EXPECTED_TABLES if table not in tables]
+    if missing_tables:
+        logger.error(f"Missing tables: {', '.join(missing_tables)}")
+        raise Exception("Missing required database tables")
+    logger.info(f"Database schema is up to date ({len(tables)} tables)")
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app import database
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_STOP = object()
+
+class DatabaseWriter:
+    """
+    Serializes database writes through one thread that owns the write connection.
+
+    Callers submit a unit of work, a function taking the writer's Session, and await its
+    result. The writer takes whatever units are queued (up to WRITE_QUEUE_MAX_BATCH, waiting
+    at most WRITE_QUEUE_MAX_WAIT seconds for more) and applies them in one transaction,
+    each inside its own SAVEPOINT, so a unit that raises is rolled back on its own and
+    its caller gets the exception. One commit then covers the whole batch; results are
+    only handed back once it succeeded.
+
+    Units must not commit. Returned ORM objects are detached after the commit, with their
+    loaded attributes still readable; relationships that weren't loaded inside the unit
+    can't be lazy-loaded afterwards.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory  # Defaults to database.WriterSessionLocal, resolved on start
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats = {"units": 0, "failed_units": 0, "batches": 0, "failed_batches": 0, "largest_batch": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the writer thread (also done on the first submit)"""
+        with self._start_lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    async def stop(self) -> None:
+        """Apply everything already queued, then stop the writer thread"""
+        if self.running:
+            self._queue.put(_STOP)
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def submit(self, unit: Callable[[Session], T]) -> T:
+        """Queue a unit of work and wait until it is committed. Exceptions raised by the unit (or the commit) propagate."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((unit, loop, future))
+        return await future
+
+    def _run(self) -> None:
+        db = (self._session_factory or database.WriterSessionLocal)()
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + Settings.WRITE_QUEUE_MAX_WAIT
+                while len(batch) < Settings.WRITE_QUEUE_MAX_BATCH:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._apply(db, batch)
+        finally:
+            db.close()
+
+    def _apply(self, db: Session, batch: List[Tuple[Callable, asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+        outcomes: List[Tuple[Any, Optional[BaseException]]] = []
+        for unit, _, _ in batch:
+            try:
+                with db.begin_nested():
+                    outcomes.append((unit(db), None))
+            except Exception as e:
+                outcomes.append((None, e))
+
+        try:
+            db.commit()
+        except Exception as e:
+            logger.error(f"Database writer: commit of {len(batch)} units failed: {str(e)}")
+            db.rollback()
+            self._stats["failed_batches"] += 1
+            outcomes = [(None, error or e) for _, error in outcomes]
+        finally:
+            # Start every batch with an empty identity map; results stay readable (expire_on_commit=False)
+            db.expunge_all()
+
+        self._stats["batches"] += 1
+        self._stats["units"] += len(batch)
+        self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+        for (_, loop, future), (result, error) in zip(batch, outcomes):
+            if error is not None:
+                self._stats["failed_units"] += 1
+            loop.call_soon_threadsafe(self._resolve, future, result, error)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+        if future.done():
+            return  # The caller stopped waiting; the unit was still applied
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        """Batch and unit counters (for monitoring)"""
+        return {**self._stats, "queued": self._queue.qsize()}
+
+db_writer = DatabaseWriter()
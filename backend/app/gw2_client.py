@@ -1,30 +1,61 @@
 import os
+import importlib.util
+import random
 import httpx
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Iterable, List
 import asyncio
 
-from .rate_limiter import TokenBucketRateLimiter
+from .rate_limiter import TokenBucketRateLimiter, Priority
+from .http_cache import ResponseCache
+from app.config import Settings
 from app.models.guild_logs import create_log_entry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ITEMS_PER_REQUEST = 200  # Max IDs the GW2 API accepts in one /v2/items?ids= call
+GUILD_RESOURCES = ("core", "logs", "members", "ranks")  # Separately fetchable parts of a guild
+
+class GW2RateLimitError(Exception):
+    """Raised when the GW2 API keeps answering 429 after all retries"""
+
+    def __init__(self, url: str, retry_after: float):
+        super().__init__(f"GW2 API rate limit exceeded for {url} (retry after {retry_after:.1f}s)")
+        self.url = url
+        self.retry_after = retry_after
+
 class GW2Client:
     def __init__(self):
         self.api_key = self._load_api_key()
-        self.base_url = "https://api.guildwars2.com/v2"
+        self.base_url = Settings.GW2_API_BASE
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
         
         # Initialize rate limiter with GW2 API limits
-        self.rate_limiter = TokenBucketRateLimiter(bucket_size=300, refill_rate=5.0)
+        self.rate_limiter = TokenBucketRateLimiter(
+            bucket_size=Settings.GW2_RATE_LIMIT_BUCKET,
+            refill_rate=Settings.GW2_RATE_LIMIT_REFILL
+        )
         logger.info(f"Initialized GW2 client with API key: {self.api_key[:8]}...")
 
         self.timeout = httpx.Timeout(30.0, connect=10.0)  # 30s read timeout, 10s connect timeout
         self.stale_after = timedelta(minutes=5)  # Consider data stale after 5 minutes
 
+        # Shared keep-alive connection pool, opened by the app lifespan (or lazily on first use)
+        self._http: Optional[httpx.AsyncClient] = None
+
+        self.cache: Optional[ResponseCache] = None
+        if Settings.GW2_CACHE_ENABLED:
+            self.cache = ResponseCache(
+                max_entries=Settings.GW2_CACHE_MAX_ENTRIES,
+                max_bytes=Settings.GW2_CACHE_MAX_BYTES,
+                disk_path=Settings.GW2_CACHE_DISK_PATH,
+                disk_max_entries=Settings.GW2_CACHE_DISK_MAX_ENTRIES
+            )
+
     def _load_api_key(self) -> str:
         """Load API key from .secrets file"""
         try:
@@ -51,6 +82,131 @@ class GW2Client:
             logger.error(f"Error loading API key: {str(e)}")
             raise Exception(f"Failed to load API key: {str(e)}")
 
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Create the pooled AsyncClient used for all outbound GW2 API traffic"""
+        http2 = Settings.GW2_HTTP2 and importlib.util.find_spec("h2") is not None
+        if Settings.GW2_HTTP2 and not http2:
+            logger.warning("HTTP/2 requested for GW2 API but the 'h2' package is not installed, using HTTP/1.1")
+
+        limits = httpx.Limits(
+            max_connections=Settings.GW2_MAX_CONNECTIONS,
+            max_keepalive_connections=Settings.GW2_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Settings.GW2_KEEPALIVE_EXPIRY
+        )
+        logger.info(f"Opening GW2 API connection pool (http2={http2}, max_connections={Settings.GW2_MAX_CONNECTIONS})")
+        return httpx.AsyncClient(timeout=self.timeout, limits=limits, http2=http2)
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The shared connection pool, created on first use if the lifespan hasn't opened it yet"""
+        if self._http is None or self._http.is_closed:
+            self._http = self._build_http_client()
+        return self._http
+
+    async def start(self) -> None:
+        """Open the connection pool. Called from the app lifespan."""
+        _ = self.http
+
+    async def aclose(self) -> None:
+        """Close the connection pool and drop any idle keep-alive connections"""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+            logger.info("Closed GW2 API connection pool")
+        self._http = None
+
+    async def request(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        authenticated: bool = True,
+        priority: Priority = Priority.BACKGROUND,
+        use_cache: bool = True,
+        revalidate: bool = False
+    ) -> httpx.Response:
+        """Send a GET request through the shared connection pool.
+
+        Every attempt acquires a token from the rate limiter in the given priority
+        lane, so user-facing calls (Priority.INTERACTIVE) are served ahead of guild
+        polling and bulk syncs. A 429 drains the
+        limiter for the Retry-After period and the request is retried with jittered
+        exponential backoff; GW2RateLimitError is raised once retries run out.
+
+        The app's API key is sent unless authenticated=False; any headers passed in
+        (e.g. a user's own Authorization header) take precedence.
+
+        Responses go through the response cache unless use_cache=False or the caller
+        passed its own headers: fresh entries are returned without a network call,
+        stale ones are revalidated with a conditional request. revalidate=True
+        revalidates even a fresh entry (for manual refreshes).
+        """
+        request_headers = dict(self.headers) if authenticated else {}
+        if headers:
+            request_headers.update(headers)
+
+        cache = self.cache if use_cache and not headers else None
+        cache_key = cached = None
+        if cache is not None:
+            cache_key = cache.key(url, params, request_headers)
+            cached = cache.get(cache_key)
+            if cached is not None and cached.fresh and not revalidate:
+                cache.record_hit()
+                return cached.to_response(url)
+            if cached is not None:
+                request_headers.update(cached.validators)
+            else:
+                cache.record_miss()
+
+        response = await self._send(url, params, request_headers, priority)
+
+        if cache is not None:
+            if response.status_code == 304 and cached is not None:
+                return cache.refresh(cache_key, cached, response).to_response(url)
+            if cached is not None:
+                cache.record_miss()  # Revalidation failed, the entry changed upstream
+            if response.status_code == 200:
+                cache.store(cache_key, response)
+        return response
+
+    async def _send(self, url: str, params: Optional[Dict[str, Any]], request_headers: Dict[str, str],
+                    priority: Priority) -> httpx.Response:
+        """Rate-limited GET with 429 retries (see request())"""
+        retry_after = 0.0
+        for attempt in range(Settings.GW2_MAX_RETRIES + 1):
+            await self.rate_limiter.acquire(priority=priority)
+            response = await self.http.get(url, params=params, headers=request_headers)
+            if response.status_code != 429:
+                return response
+
+            retry_after = self._retry_after_seconds(response, attempt)
+            self.rate_limiter.penalize(retry_after)
+            if attempt == Settings.GW2_MAX_RETRIES:
+                break
+
+            delay = retry_after + random.uniform(0, Settings.GW2_BACKOFF_BASE)
+            logger.warning(f"GW2 API returned 429 for {url}. Retry {attempt + 1}/{Settings.GW2_MAX_RETRIES} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        logger.error(f"GW2 API still rate limited after {Settings.GW2_MAX_RETRIES} retries: {url}")
+        raise GW2RateLimitError(url, retry_after)
+
+    @staticmethod
+    def _retry_after_seconds(response: httpx.Response, attempt: int) -> float:
+        """Cooldown for a 429: the Retry-After header if present, otherwise exponential backoff"""
+        backoff = Settings.GW2_BACKOFF_BASE * (2 ** attempt)
+        header = response.headers.get("Retry-After")
+        if not header:
+            return backoff
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(header)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return backoff
+
     def is_data_stale(self, last_updated: Optional[datetime]) -> bool:
         """Check if data is stale and needs to be refreshed"""
         if not last_updated:
@@ -60,93 +216,144 @@ class GW2Client:
     async def _make_request(self, url: str) -> Dict[str, Any]:
         """Make a request to the GW2 API"""
         logger.info(f"Making request to: {url}")
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=self.headers)
-            
-            if not response.is_success:
-                logger.error(f"API Error response: {response.text}")
-                return {}
-            
-            return response.json()
+        response = await self.request(url)
+        if not response.is_success:
+            logger.error(f"API Error response: {response.text}")
+            return {}
+
+        return response.json()
 
     async def _fetch_guild_logs(self, guild_id: str, last_log_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Fetch guild logs from the GW2 API"""
+        """Fetch guild logs from the GW2 API. Always revalidated: the poller's log tiers decide
+        how often logs are fetched, so a cached page must never stand in for a poll."""
         url = f"{self.base_url}/guild/{guild_id}/log"
         if last_log_id and last_log_id > 0:  # Only add since parameter if we have a valid last_log_id
             url += f"?since={last_log_id}"
         
         logger.info(f"Fetching guild logs from: {url}")
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=self.headers)
-            if not response.is_success:
-                logger.error(f"Failed to fetch guild logs for {guild_id}: {response.status_code}")
-                return []
-            
-            logs = response.json()
-            logger.info(f"Received {len(logs)} logs for guild {guild_id}")
-            return logs
+        response = await self.request(url, revalidate=True)
+        if not response.is_success:
+            logger.error(f"Failed to fetch guild logs for {guild_id}: {response.status_code}")
+            return []
 
-    async def _fetch_guild_data(self, guild_id: str) -> Dict[str, Any]:
+        logs = response.json()
+        logger.info(f"Received {len(logs)} logs for guild {guild_id}")
+        return logs
+
+    async def _fetch_guild_data(self, guild_id: str, revalidate: bool = False) -> Dict[str, Any]:
         """Fetch guild data from the GW2 API"""
         url = f"{self.base_url}/guild/{guild_id}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=self.headers)
-            if not response.is_success:
-                logger.error(f"Failed to fetch guild data for {guild_id}: {response.status_code}")
-                return {}
-            
-            return response.json()
+        response = await self.request(url, revalidate=revalidate)
+        if not response.is_success:
+            logger.error(f"Failed to fetch guild data for {guild_id}: {response.status_code}")
+            return {}
+
+        return response.json()
 
-    async def _fetch_guild_members(self, guild_id: str) -> List[Dict[str, Any]]:
+    async def _fetch_guild_members(self, guild_id: str, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Fetch guild members from the GW2 API"""
         url = f"{self.base_url}/guild/{guild_id}/members"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=self.headers)
-            if not response.is_success:
-                logger.error(f"Failed to fetch guild members for {guild_id}: {response.status_code}")
-                return []
-            
-            return response.json()
+        response = await self.request(url, revalidate=revalidate)
+        if not response.is_success:
+            logger.error(f"Failed to fetch guild members for {guild_id}: {response.status_code}")
+            return []
+
+        return response.json()
 
-    async def _fetch_guild_ranks(self, guild_id: str) -> List[Dict[str, Any]]:
+    async def _fetch_guild_ranks(self, guild_id: str, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Fetch guild ranks from the GW2 API"""
         url = f"{self.base_url}/guild/{guild_id}/ranks"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=self.headers)
-            if not response.is_success:
-                logger.error(f"Failed to fetch guild ranks for {guild_id}: {response.status_code}")
+        response = await self.request(url, revalidate=revalidate)
+        if not response.is_success:
+            logger.error(f"Failed to fetch guild ranks for {guild_id}: {response.status_code}")
+            return []
+
+        return response.json()
+
+    async def get_item_ids(self, priority: Priority = Priority.BULK) -> List[int]:
+        """Fetch the IDs of every item in the game from /v2/items"""
+        response = await self.request(f"{self.base_url}/items", authenticated=False, priority=priority,
+                                      use_cache=priority != Priority.BULK)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_items(self, item_ids: List[int], priority: Priority = Priority.INTERACTIVE) -> Dict[int, Dict[str, Any]]:
+        """Fetch many items through /v2/items?ids=, ITEMS_PER_REQUEST per call.
+        IDs the API doesn't know are simply absent from the result.
+        BULK fetches bypass the response cache so a catalog sync doesn't flush it."""
+        url = f"{self.base_url}/items"
+
+        async def fetch_chunk(chunk: List[int]) -> List[Dict[str, Any]]:
+            params = {"ids": ",".join(str(item_id) for item_id in chunk)}
+            response = await self.request(url, params=params, authenticated=False, priority=priority,
+                                          use_cache=priority != Priority.BULK)
+            if response.status_code == 404:  # None of the IDs in this chunk exist
                 return []
-            
+            response.raise_for_status()  # 206 Partial Content is a success with some IDs missing
             return response.json()
 
-    async def get_guild_data(self, guild_id: str, last_log_id: Optional[int] = None) -> Dict[str, Any]:
-        """Get all guild data from the GW2 API"""
+        chunks = [item_ids[i:i + ITEMS_PER_REQUEST] for i in range(0, len(item_ids), ITEMS_PER_REQUEST)]
+        results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+        return {api_data["id"]: api_data for chunk_result in results for api_data in chunk_result}
+
+    async def get_guild_data(
+        self,
+        guild_id: str,
+        last_log_id: Optional[int] = None,
+        revalidate: bool = False,
+        resources: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """Get guild data from the GW2 API. revalidate=True bypasses cache freshness (logs are always revalidated)
+        but still lets unchanged resources come back as cheap 304s.
+
+        resources limits the fetch to a subset of GUILD_RESOURCES ("core" is /guild/:id,
+        including the emblem); by default everything is fetched. Only the keys for the
+        fetched resources are set in the result, and "id" is always present.
+        """
+        wanted = set(GUILD_RESOURCES if resources is None else resources)
+        fetchers = {
+            "core": lambda: self._fetch_guild_data(guild_id, revalidate),
+            "logs": lambda: self._fetch_guild_logs(guild_id, last_log_id),
+            "members": lambda: self._fetch_guild_members(guild_id, revalidate),
+            "ranks": lambda: self._fetch_guild_ranks(guild_id, revalidate),
+        }
+        fetched = [resource for resource in GUILD_RESOURCES if resource in wanted]
         try:
-            # Fetch all data concurrently
-            guild_data, logs, members, ranks = await asyncio.gather(
-                self._fetch_guild_data(guild_id),
-                self._fetch_guild_logs(guild_id, last_log_id),
-                self._fetch_guild_members(guild_id),
-                self._fetch_guild_ranks(guild_id)
-            )
-            
-            if not guild_data:
-                logger.error(f"Failed to fetch basic guild data for {guild_id}")
-                return {}
-            
+            # Fetch the requested resources concurrently
+            results = dict(zip(fetched, await asyncio.gather(*(fetchers[resource]() for resource in fetched))))
+
+            guild_data: Dict[str, Any] = {"id": guild_id}
+            if "core" in results:
+                if not results["core"]:
+                    logger.error(f"Failed to fetch basic guild data for {guild_id}")
+                    return {}
+                guild_data.update(results["core"])
+
             # Add additional data to the response
-            guild_data["members"] = members
-            guild_data["ranks"] = ranks
-            guild_data["logs"] = logs
-            
-            # Add the last log ID to track pagination
-            if logs:
-                guild_data["last_log_id"] = max(log["id"] for log in logs)
-            else:
-                guild_data["last_log_id"] = last_log_id or 0
-            
+            for resource in ("members", "ranks"):
+                if resource in results:
+                    guild_data[resource] = results[resource]
+            if "logs" in results:
+                logs = results["logs"]
+                guild_data["logs"] = logs
+                # Add the last log ID to track pagination
+                if logs:
+                    guild_data["last_log_id"] = max(log["id"] for log in logs)
+                else:
+                    guild_data["last_log_id"] = last_log_id or 0
+
             return guild_data
             
         except Exception as e:
             logger.error(f"Error fetching guild data for {guild_id}: {str(e)}", exc_info=True)
-            return {} 
\ No newline at end of file
+            return {} 
+
+
+_gw2_client: Optional[GW2Client] = None
+
+def get_gw2_client() -> GW2Client:
+    """Return the process-wide GW2Client. Also usable as a FastAPI dependency."""
+    global _gw2_client
+    if _gw2_client is None:
+        _gw2_client = GW2Client()
+    return _gw2_client
@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the wire encoding rather than the content; cached bodies are stored decoded
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+DISK_PRUNE_EVERY = 100  # disk writes between size checks
+
+class CachedResponse:
+    """A stored GW2 API response plus what's needed to serve or revalidate it"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, expires_at: float):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.expires_at = expires_at  # wall-clock time, so entries survive a restart on disk
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        conditional = {}
+        if "etag" in self.headers:
+            conditional["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            conditional["If-Modified-Since"] = self.headers["last-modified"]
+        return conditional
+
+    def to_response(self, url: str) -> httpx.Response:
+        return httpx.Response(
+            self.status_code,
+            headers=self.headers,
+            content=self.content,
+            request=httpx.Request("GET", url)
+        )
+
+class ResponseCache:
+    """
+    HTTP response cache for GW2Client: an in-memory LRU with an optional on-disk second tier.
+
+    Freshness follows the response's Cache-Control max-age (or Expires). Fresh entries are
+    served without a network call; stale ones are kept as long as they carry an ETag or
+    Last-Modified so they can be revalidated with a conditional request, where a 304 costs
+    no body transfer. no-store responses are never cached.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, disk_path: Optional[str] = None, disk_max_entries: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._disk_writes = 0
+        self._stats = {"hits": 0, "misses": 0, "revalidations": 0, "disk_hits": 0, "stores": 0, "evictions": 0}
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None) -> str:
+        """Cache key for a GET: the full URL as sent (including a query string already in url), plus the credentials it was made with"""
+        full_url = str(httpx.Request("GET", url, params=params).url)
+        authorization = (headers or {}).get("Authorization", "")
+        return hashlib.sha256(f"{full_url}\n{authorization}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _expires_at(response: httpx.Response) -> Optional[float]:
+        """Absolute expiry from the response headers, or None if it must not be stored"""
+        cache_control = response.headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        now = time.time()
+        if "no-cache" in cache_control:
+            return now
+        age = 0.0
+        try:
+            age = float(response.headers.get("age", 0))
+        except ValueError:
+            pass
+        match = _MAX_AGE.search(cache_control)
+        if match:
+            return now + int(match.group(1)) - age
+        if "expires" in response.headers:
+            try:
+                return parsedate_to_datetime(response.headers["expires"]).timestamp()
+            except (TypeError, ValueError):
+                return now
+        return now
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Look an entry up in memory, then on disk. Freshness is up to the caller."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._stats["disk_hits"] += 1
+            self._remember(key, entry)
+        return entry
+
+    def store(self, key: str, response: httpx.Response) -> None:
+        """Cache a successful response if its headers allow it"""
+        expires_at = self._expires_at(response)
+        if expires_at is None:
+            return
+        has_validators = "etag" in response.headers or "last-modified" in response.headers
+        if expires_at <= time.time() and not has_validators:
+            return  # Already stale and impossible to revalidate: no point keeping it
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS}
+        entry = CachedResponse(response.status_code, headers, response.content, expires_at)
+        if len(entry.content) > self.max_bytes:
+            return
+        self._stats["stores"] += 1
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def refresh(self, key: str, entry: CachedResponse, not_modified: httpx.Response) -> CachedResponse:
+        """Apply a 304's headers to a cached entry and extend its freshness"""
+        self._stats["revalidations"] += 1
+        for name, value in not_modified.headers.items():
+            if name.lower() not in _DROPPED_HEADERS:
+                entry.headers[name.lower()] = value
+        entry.expires_at = self._expires_at(not_modified) or time.time()
+        self._write_disk(key, entry)
+        return entry
+
+    def record_hit(self) -> None:
+        self._stats["hits"] += 1
+
+    def record_miss(self) -> None:
+        self._stats["misses"] += 1
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old.content)
+        self._entries[key] = entry
+        self._bytes += len(entry.content)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.content)
+            self._stats["evictions"] += 1
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, key)
+
+    def _read_disk(self, key: str) -> Optional[CachedResponse]:
+        if not self.disk_path:
+            return None
+        try:
+            with open(self._disk_file(key), "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable HTTP cache file {key}: {str(e)}")
+            return None
+        return CachedResponse(meta["status_code"], meta["headers"], content, meta["expires_at"])
+
+    def _write_disk(self, key: str, entry: CachedResponse) -> None:
+        if not self.disk_path:
+            return
+        meta = {"status_code": entry.status_code, "headers": entry.headers, "expires_at": entry.expires_at}
+        tmp_path = f"{self._disk_file(key)}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(entry.content)
+            os.replace(tmp_path, self._disk_file(key))
+        except OSError as e:
+            logger.warning(f"Failed to write HTTP cache file {key}: {str(e)}")
+            return
+        self._disk_writes += 1
+        if self._disk_writes % DISK_PRUNE_EVERY == 0:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Drop the least recently written files once the disk tier is over its entry limit"""
+        try:
+            files = [entry for entry in os.scandir(self.disk_path) if entry.is_file()]
+        except OSError:
+            return
+        excess = len(files) - self.disk_max_entries
+        if excess <= 0:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/revalidation counters and memory use (for monitoring)"""
+        return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
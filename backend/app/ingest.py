@@ -0,0 +1,90 @@
+"""
+Background ingest: guild polling (including lottery deposits), the startup warmup, the
+item catalog sync and database maintenance.
+
+By default the web server runs all of this in its own event loop (INGEST_MODE=embedded).
+With INGEST_MODE=external the web process only serves requests, and a separate process
+started with `python -m app ingest` does the ingest. The two share nothing but the
+database, so a large log batch or roster sync can't stall in-flight HTTP requests.
+"""
+import asyncio
+import logging
+import signal
+import sys
+from typing import Optional
+
+from app.config import Settings
+from app.database import init_database
+from app.db_writer import db_writer
+from app.gw2_client import get_gw2_client
+from app.services.guild_ingest import GUILD_IDS
+from app.services.db_maintenance import database_maintenance
+from app.services.guild_poller import guild_poller
+from app.services.ingest_lease import ingest_leases, ITEM_CATALOG_LEASE, DB_MAINTENANCE_LEASE
+from app.services.item_catalog_sync import item_catalog_sync
+from app.services.warmup import database_warmup
+
+logger = logging.getLogger(__name__)
+
+_catalog_task: Optional[asyncio.Task] = None
+
+async def start_ingest() -> None:
+    """Start every ingest job in the running event loop. The GW2 client must already be started."""
+    global _catalog_task
+    # With several processes, each guild (and the item catalog sync and maintenance) is handled by
+    # one of them only. A process that takes over a guild's lease later polls that guild right away.
+    await ingest_leases.start(list(GUILD_IDS) + [ITEM_CATALOG_LEASE, DB_MAINTENANCE_LEASE], on_acquired=guild_poller.trigger)
+    # The warmup catches guilds up in the background while existing data is served
+    # (the poller's per-guild locks keep its first polls from overlapping with it)
+    database_warmup.start()
+    if Settings.GUILD_POLLER_ENABLED:
+        guild_poller.start()
+    if Settings.ITEM_CATALOG_SYNC_ENABLED:
+        _catalog_task = asyncio.create_task(
+            item_catalog_sync.run_forever(Settings.ITEM_CATALOG_SYNC_INTERVAL_HOURS * 3600)
+        )
+    if Settings.DB_MAINTENANCE_ENABLED:
+        database_maintenance.start()
+
+async def stop_ingest() -> None:
+    """Stop the ingest jobs and release their leases"""
+    global _catalog_task
+    await database_warmup.stop()
+    await guild_poller.stop()
+    if _catalog_task:
+        _catalog_task.cancel()
+        await asyncio.gather(_catalog_task, return_exceptions=True)
+        _catalog_task = None
+    await database_maintenance.stop()
+    await ingest_leases.stop()
+
+async def run_ingest() -> None:
+    """Run ingest on its own until SIGINT/SIGTERM"""
+    init_database()
+    gw2_client = get_gw2_client()
+    await gw2_client.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    try:
+        await start_ingest()
+        logger.info("Ingest process started")
+        await stopping.wait()
+        logger.info("Ingest process shutting down")
+    finally:
+        await stop_ingest()
+        await db_writer.stop()
+        await gw2_client.aclose()
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    asyncio.run(run_ingest())
@@ -0,0 +1,79 @@
+"""
+Versioned schema migrations for existing databases.
+
+create_all only creates missing tables, so changes to existing tables (new indexes,
+columns) are made here. The schema version is kept in SQLite's PRAGMA user_version;
+each migration runs in its own BEGIN IMMEDIATE transaction together with the version
+bump, so a failed migration leaves the database at the previous version and several
+processes starting at once apply it only once.
+
+A new database is created from the models, which already include every migration, and
+is stamped with the latest version without running them. So whatever a migration adds
+must also be declared on the models.
+
+Run at startup by init_database(), or on its own with `python -m app migrate`.
+"""
+import logging
+import sys
+from typing import Callable, List, Tuple
+
+from sqlalchemy.engine import Connection
+
+from app import database
+from app.database import EXPECTED_TABLES
+
+logger = logging.getLogger(__name__)
+
+def _add_log_and_membership_indexes(conn: Connection) -> None:
+    """Indexes for the log pages (by guild and time, by time, by user) and for memberships by guild"""
+    for table in EXPECTED_TABLES:
+        conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS ix_{table}_guild_id_time ON {table} (guild_id, time, id)')
+        conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS ix_{table}_time ON {table} (time, id)')
+        conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS ix_{table}_user ON {table} ("user")')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_guild_memberships_guild_id ON guild_memberships (guild_id)')
+
+# (version, description, function); append only, never renumber or edit an applied migration
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "log and membership indexes", _add_log_and_membership_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version() -> int:
+    with database.engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def stamp_latest_version() -> None:
+    """Mark a database freshly created from the models as fully migrated"""
+    with database.write_engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version={LATEST_VERSION}")
+    logger.info(f"New database stamped with schema version {LATEST_VERSION}")
+
+def run_migrations() -> int:
+    """Apply every pending migration in order; returns the resulting schema version"""
+    version = get_schema_version()
+    for migration_version, description, migrate in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        with database.write_engine.begin() as conn:
+            # Another process may have applied it while we waited for the write lock
+            version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+            if migration_version <= version:
+                continue
+            logger.info(f"Applying migration {migration_version}: {description}")
+            migrate(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version={migration_version}")
+        version = migration_version
+    logger.info(f"Database schema version {version}")
+    return version
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    from app.database import init_database
+    init_database()
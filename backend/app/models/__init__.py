@@ -11,7 +11,13 @@ from .guild_logs import (
 )
 from .mod_action import ModAction
 from .guild_standing import GuildStanding
+from .guild_lottery import LotteryEntry, LotteryWinner
 from .user import User
+from .item import Item, MissingItem
+from .sync_checkpoint import SyncCheckpoint
+from .guild_sync_state import GuildSyncState
+from .guild_refresh_request import GuildRefreshRequest
+from .ingest_lease import IngestLease
 
 # This ensures all models are imported when the models package is imported
 __all__ = [
@@ -38,5 +44,13 @@ __all__ = [
     'create_log_entry',
     'ModAction',
     'GuildStanding',
-    'User'
+    'LotteryEntry',
+    'LotteryWinner',
+    'User',
+    'Item',
+    'MissingItem',
+    'SyncCheckpoint',
+    'GuildSyncState',
+    'GuildRefreshRequest',
+    'IngestLease'
 ] 
\ No newline at end of file
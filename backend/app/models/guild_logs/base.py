@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship, declared_attr
 from datetime import datetime
 import re
@@ -16,6 +16,16 @@ class BaseGuildLog(Base):
     def guild_id(cls):
         return Column(String, ForeignKey("guilds.id"), primary_key=True)
     
+    @declared_attr
+    def __table_args__(cls):
+        # Log pages are read newest first, per guild or across guilds; id breaks ties within a second.
+        # Existing databases get these from migration 1 (app/migrations.py), so keep the names in sync.
+        return (
+            Index(f"ix_{cls.__tablename__}_guild_id_time", "guild_id", "time", "id"),
+            Index(f"ix_{cls.__tablename__}_time", "time", "id"),
+            Index(f"ix_{cls.__tablename__}_user", "user"),
+        )
+
     @declared_attr
     def guild(cls):
         # Map log types to their corresponding relationship names in the Guild model
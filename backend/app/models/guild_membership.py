@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -11,7 +11,9 @@ guild_memberships = Table(
     Column('guild_id', String, ForeignKey('guilds.id', ondelete='CASCADE'), primary_key=True),
     Column('rank', String, nullable=False),  # Current rank name in this guild
     Column('joined', DateTime, nullable=True),  # Join date for this guild
-    Column('wvw_member', Boolean, default=False)  # WvW representation status
+    Column('wvw_member', Boolean, default=False),  # WvW representation status
+    # The primary key leads with account_id, so roster queries by guild need their own index
+    Index('ix_guild_memberships_guild_id', 'guild_id')
 )
 
 class GuildMembership(Base):
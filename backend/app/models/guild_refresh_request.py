@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+class GuildRefreshRequest(Base):
+    """
+    A forced refresh of a guild asked for through the API, waiting for the process that
+    polls the guild (which may be a separate ingest process) to pick it up.
+    """
+    __tablename__ = "guild_refresh_requests"
+
+    guild_id = Column(String, primary_key=True)
+    requested_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GuildRefreshRequest(guild_id='{self.guild_id}', requested_at={self.requested_at})>"
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from app.database import Base
+from datetime import datetime
+from typing import Any, Dict
+import hashlib
+import json
+
+class GuildSyncState(Base):
+    """
+    Content fingerprint of one resource (core, emblem, ranks, members) of a tracked guild.
+    Lets a refresh skip every write for a resource whose API payload hasn't changed, while
+    checked_at still records that the guild was polled.
+    """
+    __tablename__ = "guild_sync_state"
+
+    guild_id = Column(String, ForeignKey("guilds.id", ondelete="CASCADE"), primary_key=True)
+    resource = Column(String, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    checked_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Last time the API payload was compared
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Last time the payload differed
+
+    @staticmethod
+    def fingerprint(data: Any) -> str:
+        """Stable hash of a JSON-serializable API payload"""
+        encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    @classmethod
+    def for_guild(cls, db_session, guild_id: str) -> Dict[str, "GuildSyncState"]:
+        """All fingerprints stored for a guild, keyed by resource name."""
+        return {state.resource: state for state in db_session.query(cls).filter(cls.guild_id == guild_id)}
+
+    def __repr__(self):
+        return f"<GuildSyncState(guild_id='{self.guild_id}', resource='{self.resource}', checked_at={self.checked_at})>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+class IngestLease(Base):
+    """
+    Cross-process ownership of one ingest job (a guild's polling, the item catalog sync).
+    Only the process named in owner runs the job; it keeps renewing expires_at and any
+    other process may take the lease over once it has expired.
+    """
+    __tablename__ = "ingest_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # host:pid:random suffix of the owning worker
+    acquired_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # When the current owner took over
+    heartbeat_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<IngestLease(name='{self.name}', owner='{self.owner}', expires_at={self.expires_at})>"
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Integer, String, JSON, DateTime
 from app.database import Base
+from datetime import datetime
 
 class Item(Base):
     __tablename__ = "items"
@@ -30,4 +31,44 @@ class Item(Base):
             "flags": self.flags,
             "restrictions": self.restrictions,
             **self.details  # Merge in any type-specific details
-        } 
\ No newline at end of file
+        } 
+
+    @staticmethod
+    def columns_from_api_response(api_data: dict) -> dict:
+        """Split an API item into column values; type-specific fields go into details."""
+        base_fields = {
+            "id": api_data["id"],
+            "name": api_data["name"],
+            "description": api_data.get("description"),
+            "type": api_data["type"],
+            "level": api_data["level"],
+            "rarity": api_data["rarity"],
+            "vendor_value": api_data["vendor_value"],
+            "game_types": api_data.get("game_types", []),
+            "flags": api_data.get("flags", []),
+            "restrictions": api_data.get("restrictions", [])
+        }
+
+        # Move all other fields to details
+        details = dict(api_data)
+        for field in base_fields.keys():
+            details.pop(field, None)
+
+        return {**base_fields, "details": details}
+
+    @classmethod
+    def from_api_response(cls, api_data: dict):
+        """Create an Item instance from GW2 API data"""
+        return cls(**cls.columns_from_api_response(api_data))
+
+class MissingItem(Base):
+    """Item IDs the GW2 API reported as unknown (negative cache, see services/missing_item_cache.py)"""
+    __tablename__ = "missing_items"
+
+    id = Column(Integer, primary_key=True)  # The GW2 item ID
+    first_seen_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    checked_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Last time the API said 404
+    expires_at = Column(DateTime, nullable=False, index=True)  # Ask the API again after this
+
+    def __repr__(self):
+        return f"<MissingItem(id={self.id}, expires_at={self.expires_at})>"
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+class SyncCheckpoint(Base):
+    """
+    Resume point for long-running sync jobs (e.g. the item catalog sync).
+    One row per job; position is the last ID the job finished processing.
+    """
+    __tablename__ = "sync_checkpoints"
+
+    name = Column(String, primary_key=True)
+    position = Column(Integer, nullable=True)  # NULL means no run in progress
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)  # Last time a run finished
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def get_or_create(cls, db_session, name: str):
+        """Get the checkpoint row for a job, creating an empty one if needed."""
+        checkpoint = db_session.query(cls).filter(cls.name == name).first()
+        if not checkpoint:
+            checkpoint = cls(name=name)
+            db_session.add(checkpoint)
+            db_session.flush()
+        return checkpoint
+
+    def __repr__(self):
+        return f"<SyncCheckpoint(name='{self.name}', position={self.position})>"
@@ -1,48 +1,146 @@
 import time
 import asyncio
 import logging
-from typing import Optional
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+class Priority(IntEnum):
+    """Request lanes, served strictly in this order. Lower value = more urgent."""
+    INTERACTIVE = 0  # User-facing: API key checks, item lookups for a page render
+    BACKGROUND = 1   # Guild polling
+    BULK = 2         # Catalog sync and other backfills
+
 class TokenBucketRateLimiter:
+    """Token bucket with fair FIFO queuing per priority lane.
+
+    Waiters never hold a lock while sleeping. Instead each caller parks on a future
+    and a single timer hands tokens out as they refill: always to the head of the most
+    urgent non-empty lane, in arrival order within a lane.
+    """
+
     def __init__(self, bucket_size: int = 300, refill_rate: float = 5.0):
         self.bucket_size = bucket_size
         self.refill_rate = refill_rate  # tokens per second
         self.tokens = bucket_size
         self.last_refill = time.monotonic()
-        self._lock = asyncio.Lock()
+        self.blocked_until = 0.0  # monotonic time before which no tokens are handed out
+
+        # (future, tokens requested, enqueue time) per lane
+        self._waiters: Dict[Priority, Deque[Tuple[asyncio.Future, int, float]]] = {
+            lane: deque() for lane in Priority
+        }
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._stats: Dict[Priority, Dict[str, float]] = {
+            lane: {"acquired": 0, "queued": 0, "total_wait": 0.0, "max_wait": 0.0} for lane in Priority
+        }
         logger.info(f"Initialized rate limiter with bucket size {bucket_size} and refill rate {refill_rate}/s")
 
-    async def _refill(self) -> None:
+    def _refill(self) -> None:
         """Refill tokens based on time elapsed"""
         now = time.monotonic()
-        elapsed = now - self.last_refill
+        elapsed = max(0.0, now - self.last_refill)
         refill = elapsed * self.refill_rate
         self.tokens = min(self.bucket_size, self.tokens + refill)
-        self.last_refill = now
+        self.last_refill = max(self.last_refill, now)
         logger.debug(f"Refilled tokens. Current tokens: {self.tokens:.2f}")
 
-    async def acquire(self, tokens: int = 1) -> None:
-        """Acquire tokens, waiting if necessary"""
-        async with self._lock:
-            await self._refill()
-            
-            if tokens > self.bucket_size:
-                raise ValueError(f"Requested tokens ({tokens}) exceeds bucket size ({self.bucket_size})")
-
-            # If we don't have enough tokens, calculate wait time
-            if self.tokens < tokens:
-                needed = tokens - self.tokens
-                wait_time = needed / self.refill_rate
-                logger.info(f"Rate limit reached. Waiting {wait_time:.2f}s for {needed:.2f} tokens")
-                await asyncio.sleep(wait_time)
-                await self._refill()  # Refill after waiting
+    def _can_take(self, tokens: int) -> bool:
+        return time.monotonic() >= self.blocked_until and self.tokens >= tokens
+
+    def _record(self, lane: Priority, waited: float) -> None:
+        stats = self._stats[lane]
+        stats["acquired"] += 1
+        if waited > 0:
+            stats["queued"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def _head(self) -> Optional[Priority]:
+        """Most urgent lane with a live waiter, dropping cancelled waiters along the way"""
+        for lane in Priority:
+            queue = self._waiters[lane]
+            while queue and queue[0][0].done():
+                queue.popleft()
+            if queue:
+                return lane
+        return None
+
+    def _schedule(self, delay: float = 0.0) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
 
+    def _dispatch(self) -> None:
+        """Hand tokens to queued callers in lane order until the bucket runs dry"""
+        self._wakeup = None
+        self._refill()
+        while (lane := self._head()) is not None:
+            future, tokens, enqueued = self._waiters[lane][0]
+            if not self._can_take(tokens):
+                cooldown = self.blocked_until - time.monotonic()
+                shortfall = (tokens - self.tokens) / self.refill_rate
+                self._schedule(max(cooldown, shortfall, 0.0))
+                return
+            self._waiters[lane].popleft()
             self.tokens -= tokens
-            logger.debug(f"Acquired {tokens} tokens. Remaining: {self.tokens:.2f}")
+            self._record(lane, time.monotonic() - enqueued)
+            future.set_result(None)
+
+    async def acquire(self, tokens: int = 1, priority: Priority = Priority.BACKGROUND) -> None:
+        """Acquire tokens, queuing behind earlier callers of the same or a more urgent lane"""
+        if tokens > self.bucket_size:
+            raise ValueError(f"Requested tokens ({tokens}) exceeds bucket size ({self.bucket_size})")
+
+        self._refill()
+        ahead = any(self._waiters[lane] for lane in Priority if lane <= priority)
+        if not ahead and self._can_take(tokens):
+            self.tokens -= tokens
+            self._record(priority, 0.0)
+            logger.debug(f"Acquired {tokens} tokens ({priority.name}). Remaining: {self.tokens:.2f}")
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append((future, tokens, time.monotonic()))
+        logger.debug(f"Rate limit reached. Queued {priority.name} request behind {len(self._waiters[priority]) - 1} others")
+        if self._wakeup is None:
+            self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Tokens were granted just as we got cancelled; give them back
+                self.tokens = min(self.bucket_size, self.tokens + tokens)
+            if self._wakeup is None:
+                self._schedule()
+            raise
+
+    def penalize(self, retry_after: float) -> None:
+        """Feed a 429 back into the limiter: drain the bucket and block until retry_after has passed"""
+        now = time.monotonic()
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        # Tokens only start refilling once the cooldown is over
+        self.last_refill = self.blocked_until
+        logger.warning(f"Rate limiter drained by upstream 429. Blocking for {retry_after:.2f}s")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-lane counters and wait times (for monitoring)"""
+        result = {}
+        for lane in Priority:
+            stats = self._stats[lane]
+            result[lane.name.lower()] = {
+                "acquired": stats["acquired"],
+                "queued": stats["queued"],
+                "waiting": sum(1 for future, _, _ in self._waiters[lane] if not future.done()),
+                "avg_wait": round(stats["total_wait"] / stats["queued"], 3) if stats["queued"] else 0.0,
+                "max_wait": round(stats["max_wait"], 3),
+            }
+        return result
 
     @property
     def available_tokens(self) -> float:
         """Get current number of available tokens (for monitoring)"""
-        return self.tokens 
\ No newline at end of file
+        return self.tokens
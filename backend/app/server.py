@@ -5,16 +5,15 @@ from fastapi.responses import FileResponse
 import logging
 import sys
 from contextlib import asynccontextmanager
-from sqlalchemy import inspect
-import asyncio
 
-from app.database import engine, Base, get_db, SessionLocal
+from app import database
+from app.database import init_database
 from app.api import router as api_router
-from app.api.guilds import get_guilds, _execute_guild_update_logic, GUILD_IDS, guild_update_locks, guild_update_in_progress
-from app.models.guild_logs import (
-    KickLog, InviteLog, InviteDeclineLog, JoinLog, RankChangeLog,
-    StashLog, TreasuryLog, MotdLog, UpgradeLog, InfluenceLog, MissionLog
-)
+from app.config import Settings
+from app.gw2_client import get_gw2_client
+from app.services.warmup import database_warmup
+from app.ingest import start_ingest, stop_ingest
+from app.db_writer import db_writer
 
 # Configure logging
 logging.basicConfig(
@@ -26,91 +25,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Only create tables if they don't exist
-inspector = inspect(engine)
-existing_tables = inspector.get_table_names()
-if not existing_tables:
-    logger.info("No tables found in database, creating schema...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database schema created successfully")
-else:
-    logger.info(f"Found existing tables: {', '.join(existing_tables)}")
-
-# Verify tables exist
-inspector = inspect(engine)
-tables = inspector.get_table_names()
-logger.info("Database tables found:")
-for table in tables:
-    logger.info(f"  - {table}")
-
-# Expected log tables
-expected_tables = [
-    "guild_logs_kick",
-    "guild_logs_invite",
-    "guild_logs_invite_decline",
-    "guild_logs_join",
-    "guild_logs_rank_change",
-    "guild_logs_stash",
-    "guild_logs_treasury",
-    "guild_logs_motd",
-    "guild_logs_upgrade",
-    "guild_logs_influence",
-    "guild_logs_mission"
-]
-
-missing_tables = [table for table in expected_tables if table not in tables]
-if missing_tables:
-    logger.error("Missing tables:")
-    for table in missing_tables:
-        logger.error(f"  - {table}")
-    raise Exception("Missing required database tables")
-
-async def warm_individual_guild(guild_id: str):
-    """Warms a single guild, ensuring the update is attempted by acquiring the lock."""
-    lock = guild_update_locks[guild_id]
-    
-    logger.info(f"Warmup: Attempting to acquire lock for guild {guild_id} for initial data population.")
-    # Using 'async with lock' ensures the lock is acquired (blocking) and released properly.
-    # This will make the task wait if the lock is somehow already held, ensuring the update is attempted.
-    async with lock:
-        logger.info(f"Warmup: Acquired lock for guild {guild_id}. Starting data update (force_refresh_logs=True).")
-        
-        # Mark as in progress for the duration of this locked operation.
-        guild_update_in_progress[guild_id] = True
-        
-        db_session: SessionLocal = SessionLocal()
-        try:
-            # force_refresh_logs=True is crucial for the initial population as requested.
-            await _execute_guild_update_logic(guild_id, db_session, force_refresh_logs=True)
-            logger.info(f"Warmup: Successfully updated data for guild {guild_id}.")
-        except Exception as e:
-            # Log detailed error to help diagnose issues with data population.
-            logger.error(f"Warmup: Error updating guild {guild_id} during initial population: {str(e)}", exc_info=True)
-            # Depending on policy, one might want to re-raise to halt startup if a guild fails.
-            # For now, it logs the error and continues with other guilds, aligning with current gather behavior.
-        finally:
-            if db_session: # Ensure session is closed regardless of outcome
-                db_session.close()
-            # Reset the progress flag after the operation.
-            guild_update_in_progress[guild_id] = False
-            # Lock is automatically released by 'async with' context exit.
-            logger.info(f"Warmup: Lock for guild {guild_id} released after initial population attempt.")
-
-async def warm_database():
-    """Pre-fetch guild data on startup by updating each guild sequentially by lock, but tasks gathered."""
-    logger.info("Warming up database with initial guild data...")
-    
-    # Create tasks for each guild to warm them up, potentially concurrently
-    # but respecting individual guild locks via warm_individual_guild
-    tasks = [warm_individual_guild(guild_id) for guild_id in GUILD_IDS]
-    await asyncio.gather(*tasks, return_exceptions=True) # return_exceptions to see all errors if any
-    
-    logger.info("Database warmup process completed.")
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await warm_database()
-    yield
+    init_database()
+    # One pooled HTTP client for all GW2 API traffic, kept open for the life of the app
+    gw2_client = get_gw2_client()
+    await gw2_client.start()
+    try:
+        # Serve the existing database right away; ingest runs in the background, or in its
+        # own process (`python -m app ingest`) when INGEST_MODE is "external"
+        if Settings.INGEST_MODE == "embedded":
+            await start_ingest()
+        else:
+            database_warmup.delegate()
+            logger.info("INGEST_MODE=external: guild polling and item sync run in the ingest process")
+        yield
+    finally:
+        if Settings.INGEST_MODE == "embedded":
+            await stop_ingest()
+        await db_writer.stop()
+        await database.async_engine.dispose()
+        await gw2_client.aclose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -140,7 +75,6 @@ async def get():
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up FastAPI application")
-    logger.info("Database tables created")
     logger.info("API routes configured")
 
 @app.on_event("shutdown")
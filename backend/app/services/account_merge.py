@@ -22,6 +22,8 @@ class AccountMergeService:
     ) -> Tuple[bool, str]:
         """
         Merge new_account into old_account, preserving guild memberships and history.
+        The caller commits, or rolls back when the merge didn't succeed: a failed merge
+        can leave some of its changes in the session.
         
         Args:
             db: Database session
@@ -85,8 +87,9 @@ class AccountMergeService:
                     # Delete the duplicate new membership
                     db.delete(new_membership)
                 else:
-                    # Only new account is in this guild - move membership
-                    new_membership.account_id = old_account_id
+                    # Only new account is in this guild - move membership (through the relationship, so
+                    # the new account's delete-orphan cascade no longer covers it)
+                    new_membership.account = old_account
                     moved_guilds.append(new_membership.guild_id)
             
             # Step 3: Handle user account if exists
@@ -98,21 +101,24 @@ class AccountMergeService:
                                  f"New account user: {new_account.user.username}")
                 else:
                     # Move user account to old account
-                    new_account.user.account_id = old_account_id
-                    logger.info(f"Moved user account '{new_account.user.username}' to account ID {old_account_id}")
+                    user = new_account.user
+                    user.account = old_account
+                    logger.info(f"Moved user account '{user.username}' to account ID {old_account_id}")
             
-            # Step 4: Update the old account's current name
+            # Step 4: Delete the new account (cascades to delete any remaining relationships),
+            # flushed first so its name is free for the old account
+            db.delete(new_account)
+            db.flush()
+            
+            # Step 5: Update the old account's current name
+            old_account_name = old_account.current_account_name
             old_account.current_account_name = new_account.current_account_name
             old_account.updated_at = datetime.utcnow()
             
-            # Step 5: Delete the new account (cascades to delete any remaining relationships)
-            db.delete(new_account)
-            
-            # Commit all changes
-            db.commit()
+            db.flush()
             
             message = (f"Successfully merged account '{new_account.current_account_name}' into "
-                      f"'{old_account.current_account_name}'. "
+                      f"'{old_account_name}'. "
                       f"Merged {len(merged_guilds)} guild memberships, "
                       f"moved {len(moved_guilds)} guild memberships.")
             
@@ -120,7 +126,6 @@ class AccountMergeService:
             return True, message
             
         except Exception as e:
-            db.rollback()
             error_msg = f"Failed to merge accounts: {str(e)}"
             logger.error(error_msg, exc_info=True)
             return False, error_msg
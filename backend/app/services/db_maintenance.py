@@ -0,0 +1,181 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+
+from app.config import Settings
+from app.database import DB_FILE
+from app.db_writer import db_writer
+from app.services.ingest_lease import ingest_leases, DB_MAINTENANCE_LEASE
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2  # PRAGMA auto_vacuum reports the mode as a number
+
+class DatabaseMaintenance:
+    """
+    Keeps the SQLite file in shape under an append-heavy write load.
+
+    Three jobs run on their own intervals:
+    - checkpoint: wal_checkpoint(TRUNCATE) copies the WAL back into the database and
+      truncates it, so it doesn't grow without bound between SQLite's passive checkpoints.
+    - optimize: PRAGMA optimize refreshes the planner statistics of tables that changed
+      enough to need it (a full ANALYZE when there are no statistics yet).
+    - vacuum: incremental_vacuum hands up to DB_VACUUM_MAX_PAGES free pages back to the OS.
+      Only possible when the file was created with auto_vacuum=INCREMENTAL.
+
+    optimize runs as a unit of work on the database writer, so writes queue behind a long
+    first ANALYZE instead of timing out. checkpoint and vacuum need to run outside a
+    transaction and use a connection of their own, with a short busy timeout
+    (DB_CHECKPOINT_BUSY_TIMEOUT, DB_VACUUM_BUSY_TIMEOUT) so they never hold up the writer
+    for long. A job that failed, or a checkpoint that readers kept from finishing, is
+    retried after DB_MAINTENANCE_RETRY_INTERVAL. Only the holder of the db_maintenance
+    ingest lease runs the jobs.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._jobs: Dict[str, Callable] = {
+            "checkpoint": self._checkpoint,
+            "optimize": self._optimize,
+            "vacuum": self._incremental_vacuum,
+        }
+        self.status: Dict[str, Dict[str, Any]] = {
+            name: {"runs": 0, "errors": 0, "last_run": None, "last_duration_ms": None, "last_result": None}
+            for name in self._jobs
+        }
+
+    @staticmethod
+    def intervals() -> Dict[str, int]:
+        return {
+            "checkpoint": Settings.DB_CHECKPOINT_INTERVAL,
+            "optimize": Settings.DB_OPTIMIZE_INTERVAL,
+            "vacuum": Settings.DB_VACUUM_INTERVAL,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the maintenance loop. Called when ingest starts."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Database maintenance started")
+
+    async def stop(self) -> None:
+        """Cancel the maintenance loop; a job already running on its thread still completes"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("Database maintenance stopped")
+
+    async def _run(self) -> None:
+        next_run = {name: time.monotonic() + interval for name, interval in self.intervals().items()}
+        while True:
+            await asyncio.sleep(max(0.0, min(next_run.values()) - time.monotonic()))
+            if not ingest_leases.owns(DB_MAINTENANCE_LEASE):
+                # Another worker does the maintenance; check back in case it goes away
+                next_run = {name: time.monotonic() + Settings.INGEST_LEASE_TTL for name in next_run}
+                continue
+            for name, interval in self.intervals().items():
+                if time.monotonic() >= next_run[name]:
+                    result = await self.run_job(name)
+                    next_run[name] = time.monotonic() + interval
+                    if result is None or (name == "checkpoint" and result["busy"]):
+                        next_run[name] = time.monotonic() + Settings.DB_MAINTENANCE_RETRY_INTERVAL
+                    elif name == "vacuum" and result and result.get("freed_pages"):
+                        # The file only shrinks once the truncated pages are checkpointed out of the WAL
+                        next_run["checkpoint"] = time.monotonic()
+
+    async def run_job(self, name: str) -> Optional[Dict[str, Any]]:
+        """Run one maintenance job now and record how it went; returns None if it failed"""
+        status = self.status[name]
+        started = time.monotonic()
+        result = None
+        try:
+            if name == "optimize":
+                result = await db_writer.submit(lambda db: self._run_on(db.connection().connection, name))
+            else:
+                result = await asyncio.to_thread(self._run_on_own_connection, name)
+            logger.info(f"Database maintenance: {name} finished in {(time.monotonic() - started) * 1000:.0f} ms: {result}")
+        except Exception as e:
+            status["errors"] += 1
+            logger.error(f"Database maintenance: {name} failed: {str(e)}")
+        status["runs"] += 1
+        status["last_run"] = datetime.utcnow().isoformat()
+        status["last_duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        status["last_result"] = result
+        return result
+
+    def _run_on(self, dbapi_connection, name: str) -> Dict[str, Any]:
+        cursor = dbapi_connection.cursor()
+        try:
+            return self._jobs[name](cursor)
+        finally:
+            cursor.close()
+
+    def _run_on_own_connection(self, name: str) -> Dict[str, Any]:
+        busy_timeout = Settings.DB_CHECKPOINT_BUSY_TIMEOUT if name == "checkpoint" else Settings.DB_VACUUM_BUSY_TIMEOUT
+        dbapi_connection = sqlite3.connect(DB_FILE, timeout=busy_timeout, isolation_level=None)
+        try:
+            return self._run_on(dbapi_connection, name)
+        finally:
+            dbapi_connection.close()
+
+    @staticmethod
+    def _checkpoint(cursor) -> Dict[str, Any]:
+        # PASSIVE copies what it can without waiting on anyone. TRUNCATE holds off writers while it
+        # waits for readers, so it is only tried once everything is copied and it just resets the WAL.
+        busy, wal_frames, checkpointed_frames = cursor.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        if not busy and wal_frames == checkpointed_frames:
+            busy, wal_frames, checkpointed_frames = cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        # busy means a reader kept part of the WAL in use; the rest was still checkpointed
+        busy = busy or checkpointed_frames < wal_frames
+        return {"busy": bool(busy), "wal_frames": wal_frames, "checkpointed_frames": checkpointed_frames}
+
+    @staticmethod
+    def _optimize(cursor) -> Dict[str, Any]:
+        has_stats = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        if has_stats:
+            cursor.execute("PRAGMA optimize").fetchall()
+            return {"analyzed": "optimize"}
+        cursor.execute("ANALYZE")
+        return {"analyzed": "full"}
+
+    @staticmethod
+    def _incremental_vacuum(cursor) -> Dict[str, Any]:
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return {"skipped": "database was not created with auto_vacuum=INCREMENTAL"}
+        free_before = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_before:
+            # The pragma frees one page per step and execute() only steps once; executescript runs it to the end
+            cursor.executescript(f"PRAGMA incremental_vacuum({Settings.DB_VACUUM_MAX_PAGES});")
+        free_after = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        return {"freed_pages": free_before - free_after, "free_pages": free_after}
+
+    def stats(self) -> Dict[str, Any]:
+        """File sizes and the outcome of each job's last run (for monitoring)"""
+        def size(path: str) -> Optional[int]:
+            try:
+                return os.path.getsize(path)
+            except OSError:
+                return None
+
+        return {
+            "enabled": Settings.DB_MAINTENANCE_ENABLED,
+            "running": self.running,
+            "owned": ingest_leases.owns(DB_MAINTENANCE_LEASE),
+            "db_bytes": size(DB_FILE),
+            "wal_bytes": size(f"{DB_FILE}-wal"),
+            "intervals": self.intervals(),
+            "jobs": self.status,
+        }
+
+database_maintenance = DatabaseMaintenance()
@@ -0,0 +1,267 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+from app.config import Settings
+from app import database
+from app.db_writer import db_writer
+from app.gw2_client import get_gw2_client, GUILD_RESOURCES
+from app.models.account import Account
+from app.models.guild import Guild, GuildEmblem
+from app.models.guild_rank import GuildRank
+from app.models.guild_sync_state import GuildSyncState
+from app.services.log_ingest import LogIngestService
+from app.services.roster_sync import RosterSyncService, RosterDiff
+
+logger = logging.getLogger(__name__)
+
+# List of guild IDs to track
+GUILD_IDS = [
+    "C8260C3D-F677-E711-80D4-E4115BEBA648",  # Power
+    "4C345327-7D78-E711-80D4-E4115BEBA648",  # Primal
+    "BDEF3AB3-7F78-E711-80DA-101F7433AF15",  # Phoenix
+    "11605C96-8578-E711-80DA-101F7433AF15",  # Pain
+    "5C59E515-A66D-E811-81A8-83C7278578E0",  # Perfect
+    "90EE62DE-B813-EF11-BA1F-12061042B485",  # Pips
+]
+
+# Guild fields covered by the "core" fingerprint (last_log_id moves with the logs and is handled separately)
+GUILD_CORE_FIELDS = ["id", "name", "tag", "level", "motd", "influence", "aetherium", "resonance", "favor"]
+
+# For managing concurrent updates to the same guild_id within this instance
+guild_update_locks: Dict[str, asyncio.Lock] = {
+    guild_id: asyncio.Lock() for guild_id in GUILD_IDS
+}
+
+class GuildUpdateResult:
+    """What one update_guild() call fetched and changed"""
+
+    def __init__(self, guild_id: str, resources: Set[str]):
+        self.guild_id = guild_id
+        self.resources = resources  # Resources requested from the API
+        self.failed = False  # True if the API returned nothing usable
+        self.logs_fetched = 0  # Entries the log endpoint returned
+        self.logs_incremental = False  # Whether logs were requested with ?since=
+        self.new_logs = 0
+        self.roster_diff: Optional[RosterDiff] = None  # None unless a member list was received
+
+def _process_lottery_deposits(db: Session, guild_id: str, new_logs: List[dict]):
+    """Enter new coin deposits into the lottery, each in its own savepoint so one failure doesn't undo the ingest."""
+    deposits = [
+        log_entry for log_entry in new_logs
+        if log_entry["type"] == "stash" and log_entry["operation"] == "deposit" and log_entry.get("coins", 0) > 0
+    ]
+    if not deposits:
+        return
+
+    try:
+        # Get account IDs for everyone who made a deposit in one query
+        names = {log_entry["user"] for log_entry in deposits}
+        accounts = {
+            account.current_account_name: account
+            for account in db.query(Account).filter(Account.current_account_name.in_(names))
+        }
+    except Exception as e:
+        logger.error(f"Error looking up accounts for lottery entries: {e}")
+        return
+
+    from app.api.lottery import process_lottery_entry
+
+    for log_entry in deposits:
+        account = accounts.get(log_entry["user"])
+        if not account:
+            continue
+        try:
+            with db.begin_nested():
+                result = process_lottery_entry(
+                    db,
+                    guild_id=guild_id,
+                    account_id=account.id,
+                    copper_amount=log_entry["coins"]
+                )
+            if result:
+                logger.info(f"Successfully processed lottery entry for {account.current_account_name}")
+        except Exception as e:
+            logger.error(f"Error processing lottery entry for {account.current_account_name} in guild {guild_id}: {e}")
+
+def _resource_changed(db: Session, sync_states: Dict[str, GuildSyncState], guild_id: str,
+                      resource: str, data, now: datetime) -> bool:
+    """Record that a guild resource was checked and report whether its payload differs from the last sync."""
+    content_hash = GuildSyncState.fingerprint(data)
+    state = sync_states.get(resource)
+    if state is None:
+        state = GuildSyncState(guild_id=guild_id, resource=resource, content_hash=content_hash, checked_at=now, changed_at=now)
+        db.add(state)
+        sync_states[resource] = state
+        return True
+    state.checked_at = now
+    if state.content_hash == content_hash:
+        return False
+    state.content_hash = content_hash
+    state.changed_at = now
+    return True
+
+def due_resources(sync_states: Dict[str, GuildSyncState], now: datetime) -> Set[str]:
+    """Guild resources whose refresh tier has expired since they were last checked."""
+    due = set()
+    for resource, seconds in Settings.GUILD_REFRESH_TIERS.items():
+        state = sync_states.get(resource)
+        if state is None or now - state.checked_at >= timedelta(seconds=seconds):
+            due.add(resource)
+    return due
+
+def _load_guild_state(guild_id: str) -> Tuple[Optional[Guild], Dict[str, GuildSyncState]]:
+    """The stored guild row and its sync states, read on a session of its own (runs on a thread)"""
+    db = database.SessionLocal()
+    try:
+        return db.query(Guild).filter(Guild.id == guild_id).first(), GuildSyncState.for_guild(db, guild_id)
+    finally:
+        db.close()
+
+async def update_guild(
+    guild_id: str, 
+    force_refresh_logs: bool = False,
+    always_fetch: Optional[Set[str]] = None
+) -> GuildUpdateResult:
+    """Core logic to fetch and update data for a single guild.
+    Fetches the resources whose GUILD_REFRESH_TIERS interval has expired, plus always_fetch
+    (all of them for a new guild or a forced refresh). Resources whose payload fingerprint
+    matches the last sync are not written at all. The stored state is read on a thread and
+    all writes go through the database writer as one unit of work, so the event loop never
+    waits on the database."""
+    logger.info(f"Executing update logic for guild {guild_id}. Force refresh logs: {force_refresh_logs}")
+    try:
+        guild, sync_states = await asyncio.to_thread(_load_guild_state, guild_id)
+
+        # Only hit the endpoints whose refresh tier has expired
+        if not guild or force_refresh_logs:
+            resources = set(GUILD_RESOURCES)
+        else:
+            resources = due_resources(sync_states, datetime.utcnow()) | (always_fetch or set())
+        result = GuildUpdateResult(guild_id, resources)
+        if not resources:
+            logger.info(f"Core Logic: Nothing due for guild {guild_id}, skipping API calls.")
+            return result
+
+        current_last_log_id = None
+        if guild and not force_refresh_logs:
+            current_last_log_id = guild.last_log_id
+        
+        guild_api_data = await get_gw2_client().get_guild_data(
+            guild_id,
+            last_log_id=current_last_log_id,
+            revalidate=force_refresh_logs,
+            resources=resources
+        )
+
+        if not guild_api_data:
+            logger.warning(f"Core Logic: No data received for guild {guild_id} from API.")
+            result.failed = True
+            return result
+
+        await db_writer.submit(
+            lambda write_db: _apply_guild_data(write_db, guild_api_data, result, current_last_log_id)
+        )
+        logger.info(f"Core Logic: Update completed successfully for guild {guild_id}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Core Logic Error for guild {guild_id}: {str(e)}", exc_info=True)
+        raise # Re-raise the exception so the caller (poller or warmup) can know
+
+def _apply_guild_data(db: Session, guild_api_data: dict, result: GuildUpdateResult,
+                      current_last_log_id: Optional[int]) -> None:
+    """Write one guild's fetched API data. A unit of work for the database writer; fills in result."""
+    guild_id = result.guild_id
+    resources = result.resources
+    guild = db.query(Guild).filter(Guild.id == guild_id).first()
+    sync_states = GuildSyncState.for_guild(db, guild_id)
+    logger.info(f"Core Logic: Refreshed {', '.join(sorted(resources))} for guild {guild_id}")
+    now = datetime.utcnow()
+
+    # Process guild data
+    core_data = {field: guild_api_data.get(field) for field in GUILD_CORE_FIELDS}
+    if "core" in resources and (_resource_changed(db, sync_states, guild_id, "core", core_data, now) or not guild):
+        if not guild:
+            guild = Guild(
+                id=guild_api_data["id"],
+                name=guild_api_data["name"],
+                tag=guild_api_data["tag"],
+                level=guild_api_data.get("level", 0),
+                motd=guild_api_data["motd"],
+                influence=guild_api_data["influence"],
+                aetherium=guild_api_data["aetherium"],
+                resonance=guild_api_data["resonance"],
+                favor=guild_api_data["favor"],
+                last_log_id=guild_api_data.get("last_log_id", 0)
+            )
+            db.add(guild)
+            db.flush()
+
+        guild.name = guild_api_data["name"]
+        guild.tag = guild_api_data["tag"]
+        guild.level = guild_api_data.get("level", 0)
+        guild.motd = guild_api_data["motd"]
+        guild.influence = guild_api_data["influence"]
+        guild.aetherium = guild_api_data["aetherium"]
+        guild.resonance = guild_api_data["resonance"]
+        guild.favor = guild_api_data["favor"]
+        guild.last_updated = now
+    if "logs" in resources:
+        # Only written when it actually moved; the ORM skips the UPDATE for an unchanged value
+        guild.last_log_id = guild_api_data["last_log_id"]
+        _resource_changed(db, sync_states, guild_id, "logs", guild.last_log_id, now)
+    db.flush()
+
+    # Process emblem
+    if "core" in resources and guild_api_data.get("emblem") and _resource_changed(db, sync_states, guild_id, "emblem", guild_api_data["emblem"], now):
+        emblem_data = guild_api_data["emblem"]
+        if not guild.emblem:
+            guild.emblem = GuildEmblem(guild_id=guild.id)
+        guild.emblem.background_id = emblem_data["background"]["id"]
+        guild.emblem.background_colors = emblem_data["background"]["colors"]
+        guild.emblem.foreground_id = emblem_data["foreground"]["id"]
+        guild.emblem.foreground_colors = emblem_data["foreground"]["colors"]
+        guild.emblem.flags = emblem_data.get("flags", [])
+        db.flush()
+    
+    # Process logs
+    if "logs" in resources:
+        result.logs_fetched = len(guild_api_data["logs"])
+        result.logs_incremental = current_last_log_id is not None and current_last_log_id > 0
+    if guild_api_data.get("logs"):
+        new_logs = LogIngestService.ingest_logs(db, guild_id, guild_api_data["logs"])
+        result.new_logs = len(new_logs)
+        if new_logs:
+            logger.info(f"Core Logic: Added {len(new_logs)} new logs for guild {guild_id}")
+            _process_lottery_deposits(db, guild_id, new_logs)
+
+    # Process ranks
+    ranks_data = sorted(guild_api_data.get("ranks") or [], key=lambda rank_data: rank_data["id"])
+    if ranks_data and _resource_changed(db, sync_states, guild_id, "ranks", ranks_data, now):
+        existing_ranks = {rank.id: rank for rank in db.query(GuildRank).filter_by(guild_id=guild_id).all()}
+        processed_rank_ids = set()
+        for rank_data in guild_api_data["ranks"]:
+            rank_id = rank_data["id"]
+            processed_rank_ids.add(rank_id)
+            rank = existing_ranks.get(rank_id)
+            if rank:
+                rank.order = rank_data["order"]
+                rank.permissions = rank_data["permissions"]
+                rank.icon = rank_data.get("icon")
+            else:
+                rank = GuildRank.from_api_response(guild_id, rank_data)
+                db.add(rank)
+        for rank_id_to_delete in set(existing_ranks.keys()) - processed_rank_ids:
+            db.delete(existing_ranks[rank_id_to_delete])
+        db.flush()
+
+    # Process members
+    members_data = sorted(guild_api_data.get("members") or [], key=lambda member_data: member_data["name"])
+    if members_data and _resource_changed(db, sync_states, guild_id, "members", members_data, now):
+        result.roster_diff = RosterSyncService.sync_members(db, guild_id, members_data)
+    elif members_data:
+        result.roster_diff = RosterDiff()
+    
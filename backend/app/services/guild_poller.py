@@ -0,0 +1,205 @@
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import random
+
+from app.config import Settings
+from app import database
+from app.db_writer import db_writer
+from app.models.guild_refresh_request import GuildRefreshRequest
+from app.services.guild_ingest import GUILD_IDS, guild_update_locks, update_guild
+from app.services.ingest_lease import ingest_leases
+
+logger = logging.getLogger(__name__)
+
+LOG_PAGE_LIMIT = 100  # The GW2 API never returns more log entries than this in one response
+
+class GuildPoller:
+    """
+    Polls every tracked guild in the background, independent of API traffic.
+
+    Each guild has its own timer. Every tick fetches the guild's logs plus whichever other
+    resources are due under GUILD_REFRESH_TIERS; at most GUILD_POLL_CONCURRENCY guilds are
+    updated at once and every interval is jittered so the guilds don't poll in lockstep.
+
+    The log interval adapts to volume: a poll that comes back near LOG_PAGE_LIMIT halves it
+    (down to GUILD_POLL_MIN_LOG_INTERVAL), quiet polls relax it back towards the logs tier.
+    A ?since= poll that returns a full page may have missed entries, since the API only
+    serves the most recent page; those are counted as possible gaps and logged.
+
+    Every worker runs the timers, but a tick only polls if this worker holds the guild's
+    ingest lease, so several uvicorn workers don't multiply upstream traffic. Forced
+    refreshes asked for through the API are recorded in guild_refresh_requests (see
+    request_refresh()); every GUILD_REFRESH_REQUEST_INTERVAL seconds the owner of each
+    requested guild takes the request and polls it right away.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._forced: Dict[str, bool] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._requests_task: Optional[asyncio.Task] = None
+        self.status: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks.values())
+
+    def start(self) -> None:
+        """Start one polling task per tracked guild. Called from the app lifespan."""
+        if self.running:
+            return
+        self._semaphore = asyncio.Semaphore(Settings.GUILD_POLL_CONCURRENCY)
+        for guild_id in GUILD_IDS:
+            self._wakeups[guild_id] = asyncio.Event()
+            self._forced[guild_id] = False
+            self.status[guild_id] = {
+                "log_interval": float(Settings.GUILD_REFRESH_TIERS["logs"]),
+                "last_poll": None,
+                "next_poll": None,
+                "polls": 0,
+                "errors": 0,
+                "possible_gaps": 0,
+                "last_gap_at": None,
+            }
+            self._tasks[guild_id] = asyncio.create_task(self._run(guild_id))
+        self._requests_task = asyncio.create_task(self._take_refresh_requests())
+        logger.info(f"Guild poller started for {len(GUILD_IDS)} guilds")
+
+    async def stop(self) -> None:
+        """Cancel all polling tasks and wait for them to finish"""
+        tasks = list(self._tasks.values()) + ([self._requests_task] if self._requests_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._requests_task = None
+        logger.info("Guild poller stopped")
+
+    def trigger(self, guild_id: str, force: bool = False) -> bool:
+        """Poll a guild now instead of waiting for its timer. Returns False if it isn't being polled."""
+        if guild_id not in self._wakeups or not self.running:
+            return False
+        self._forced[guild_id] = self._forced[guild_id] or force
+        self._wakeups[guild_id].set()
+        return True
+
+    async def request_refresh(self, guild_ids: List[str]) -> None:
+        """
+        Force a refresh of the given guilds in whichever process polls them: right away if
+        that's this one, otherwise through guild_refresh_requests.
+        """
+        remote = [guild_id for guild_id in guild_ids
+                  if not (ingest_leases.owns(guild_id) and self.trigger(guild_id, force=True))]
+        if not remote:
+            return
+
+        def record(db: Session) -> None:
+            stmt = sqlite_insert(GuildRefreshRequest.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["guild_id"], set_={"requested_at": stmt.excluded.requested_at}
+            )
+            now = datetime.utcnow()
+            db.execute(stmt, [{"guild_id": guild_id, "requested_at": now} for guild_id in remote])
+
+        await db_writer.submit(record)
+        logger.info(f"Guild poller: refresh of {len(remote)} guilds handed to the process that polls them")
+
+    @staticmethod
+    def _pending_refresh_requests() -> List[str]:
+        db = database.SessionLocal()
+        try:
+            return [guild_id for (guild_id,) in db.query(GuildRefreshRequest.guild_id)]
+        finally:
+            db.close()
+
+    async def _take_refresh_requests(self) -> None:
+        while True:
+            await asyncio.sleep(Settings.GUILD_REFRESH_REQUEST_INTERVAL)
+            try:
+                mine = [guild_id for guild_id in await asyncio.to_thread(self._pending_refresh_requests)
+                        if guild_id in self._wakeups and ingest_leases.owns(guild_id)]
+                if not mine:
+                    continue
+                await db_writer.submit(
+                    lambda db: db.query(GuildRefreshRequest).filter(
+                        GuildRefreshRequest.guild_id.in_(mine)
+                    ).delete(synchronize_session=False)
+                )
+                for guild_id in mine:
+                    self.trigger(guild_id, force=True)
+            except Exception as e:
+                logger.error(f"Guild poller: checking refresh requests failed: {str(e)}")
+
+    @staticmethod
+    def _jitter(seconds: float) -> float:
+        return seconds * random.uniform(1 - Settings.GUILD_POLL_JITTER, 1 + Settings.GUILD_POLL_JITTER)
+
+    async def _run(self, guild_id: str) -> None:
+        status = self.status[guild_id]
+        # Spread the first polls out so a restart doesn't hit every guild at once
+        delay = random.uniform(0, min(status["log_interval"], Settings.GUILD_POLL_START_SPREAD))
+        while True:
+            status["next_poll"] = (datetime.utcnow() + timedelta(seconds=delay)).isoformat()
+            try:
+                await asyncio.wait_for(self._wakeups[guild_id].wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeups[guild_id].clear()
+            force, self._forced[guild_id] = self._forced[guild_id], False
+            if not ingest_leases.owns(guild_id):
+                delay = self._jitter(status["log_interval"])
+                continue
+
+            try:
+                async with self._semaphore:
+                    await self._poll(guild_id, force)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                status["errors"] += 1
+                logger.error(f"Guild poller: update failed for guild {guild_id}: {str(e)}")
+            delay = self._jitter(status["log_interval"])
+
+    async def _poll(self, guild_id: str, force: bool) -> None:
+        status = self.status[guild_id]
+        async with guild_update_locks[guild_id]:
+            # The poller's own timer decides when logs are due
+            result = await update_guild(guild_id, force_refresh_logs=force, always_fetch={"logs"})
+
+        status["polls"] += 1
+        status["last_poll"] = datetime.utcnow().isoformat()
+        if result.failed:
+            status["errors"] += 1
+            return
+        if "logs" in result.resources:
+            self._adapt_log_interval(guild_id, result.logs_fetched, result.logs_incremental)
+
+    def _adapt_log_interval(self, guild_id: str, logs_fetched: int, incremental: bool) -> None:
+        status = self.status[guild_id]
+        base = float(Settings.GUILD_REFRESH_TIERS["logs"])
+        interval = status["log_interval"]
+
+        if incremental and logs_fetched >= LOG_PAGE_LIMIT:
+            status["possible_gaps"] += 1
+            status["last_gap_at"] = datetime.utcnow().isoformat()
+            logger.warning(f"Guild poller: guild {guild_id} returned a full page of {logs_fetched} new logs; older entries may have been missed")
+
+        if logs_fetched >= LOG_PAGE_LIMIT * Settings.GUILD_POLL_BUSY_FRACTION:
+            interval = max(Settings.GUILD_POLL_MIN_LOG_INTERVAL, interval / 2)
+        elif logs_fetched < LOG_PAGE_LIMIT * Settings.GUILD_POLL_BUSY_FRACTION / 4:
+            interval = min(base, interval * 1.5)
+
+        if interval != status["log_interval"]:
+            logger.info(f"Guild poller: log interval for guild {guild_id} now {interval:.0f}s ({logs_fetched} logs in last poll)")
+        status["log_interval"] = interval
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-guild polling state (for monitoring)"""
+        return {guild_id: dict(status, owned=ingest_leases.owns(guild_id)) for guild_id, status in self.status.items()}
+
+guild_poller = GuildPoller()
@@ -0,0 +1,151 @@
+from sqlalchemy import case, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from app.config import Settings
+from app import database
+from app.models.ingest_lease import IngestLease
+
+logger = logging.getLogger(__name__)
+
+ITEM_CATALOG_LEASE = "item_catalog"
+DB_MAINTENANCE_LEASE = "db_maintenance"
+
+class IngestLeaseManager:
+    """
+    Decides which worker process runs which ingest job when uvicorn runs several workers.
+
+    Every job (one per tracked guild, plus the item catalog sync and database maintenance) has a row in ingest_leases.
+    A worker claims a lease with a single conditional upsert that only succeeds when the row
+    is new, already ours, or expired, then renews its leases every INGEST_LEASE_HEARTBEAT
+    seconds. If the owner dies, its leases expire after INGEST_LEASE_TTL and the next
+    heartbeat of another worker takes them over. With INGEST_LEASE_ENABLED off every
+    process owns every job, as in a single-worker deployment.
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._names: List[str] = []
+        self._held: Set[str] = set()
+        self._valid_until = 0.0  # monotonic time our last successful claim expires
+        self._on_acquired: Optional[Callable[[str], Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def owns(self, name: str) -> bool:
+        if not Settings.INGEST_LEASE_ENABLED:
+            return True
+        # Past the TTL of our last successful heartbeat another worker may already have taken over
+        return name in self._held and time.monotonic() < self._valid_until
+
+    def _claim(self, names: Iterable[str]) -> Set[str]:
+        """Claim or renew each named lease; returns the names this process now holds"""
+        valid_until = time.monotonic() + Settings.INGEST_LEASE_TTL
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=Settings.INGEST_LEASE_TTL)
+        table = IngestLease.__table__
+        held = set()
+        db = database.SessionLocal()
+        try:
+            for name in names:
+                stmt = sqlite_insert(table).values(
+                    name=name, owner=self.owner, acquired_at=now, heartbeat_at=now, expires_at=expires_at
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.name],
+                    set_={
+                        "owner": stmt.excluded.owner,
+                        # Keep the original acquisition time while renewing our own lease
+                        "acquired_at": case((table.c.owner == stmt.excluded.owner, table.c.acquired_at), else_=stmt.excluded.acquired_at),
+                        "heartbeat_at": stmt.excluded.heartbeat_at,
+                        "expires_at": stmt.excluded.expires_at,
+                    },
+                    where=or_(table.c.owner == stmt.excluded.owner, table.c.expires_at < now)
+                )
+                if db.execute(stmt).rowcount:
+                    held.add(name)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._valid_until = valid_until
+        return held
+
+    def _release(self, names: Iterable[str]) -> None:
+        db = database.SessionLocal()
+        try:
+            db.query(IngestLease).filter(
+                IngestLease.name.in_(list(names)), IngestLease.owner == self.owner
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _update_held(self, held: Set[str]) -> None:
+        gained, lost = held - self._held, self._held - held
+        self._held = held
+        for name in sorted(lost):
+            logger.warning(f"Ingest lease: lost ownership of {name}")
+        for name in sorted(gained):
+            logger.info(f"Ingest lease: {self.owner} now owns {name}")
+            if self._on_acquired:
+                self._on_acquired(name)
+
+    async def start(self, names: Iterable[str], on_acquired: Optional[Callable[[str], Any]] = None) -> None:
+        """
+        Claim what we can right away (so the startup warmup knows which guilds are ours),
+        then keep heartbeating in the background. on_acquired is called for every lease
+        this process gains after that, e.g. when another worker died.
+        """
+        self._names = list(names)
+        if not Settings.INGEST_LEASE_ENABLED:
+            return
+        try:
+            self._held = await asyncio.to_thread(self._claim, self._names)
+        except Exception as e:
+            logger.error(f"Ingest lease: initial claim failed: {str(e)}")
+        logger.info(f"Ingest lease: {self.owner} owns {len(self._held)}/{len(self._names)} ingest jobs")
+        self._on_acquired = on_acquired
+        self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """Stop heartbeating and hand our leases back so another worker can take over at once"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._held:
+            try:
+                await asyncio.to_thread(self._release, self._held)
+            except Exception as e:
+                logger.error(f"Ingest lease: failed to release leases: {str(e)}")
+            self._held = set()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(Settings.INGEST_LEASE_HEARTBEAT)
+            try:
+                held = await asyncio.to_thread(self._claim, self._names)
+            except Exception as e:
+                # Keep what we had; if this persists the leases expire and another worker takes over
+                logger.error(f"Ingest lease: heartbeat failed: {str(e)}")
+                continue
+            self._update_held(held)
+
+    def stats(self) -> Dict[str, Any]:
+        """Which ingest jobs this worker owns (for monitoring)"""
+        return {
+            "enabled": Settings.INGEST_LEASE_ENABLED,
+            "owner": self.owner,
+            "held": sorted(self._held) if Settings.INGEST_LEASE_ENABLED else sorted(self._names),
+        }
+
+ingest_leases = IngestLeaseManager()
@@ -0,0 +1,146 @@
+from sqlalchemy.orm import Session
+from typing import Optional
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import time
+
+from app.config import Settings
+from app.models.item import Item
+
+logger = logging.getLogger(__name__)
+
+# File layout (little-endian):
+#   header: MAGIC, uint32 item count
+#   index:  count x (uint32 item id, uint64 blob offset, uint32 blob length), sorted by id
+#   data:   the JSON blobs back to back
+MAGIC = b"GW2ITEM1"
+HEADER = struct.Struct("<8sI")
+INDEX_ENTRY = struct.Struct("<IQI")
+RELOAD_CHECK_SECONDS = 30.0
+
+class ItemBlobCatalog:
+    """
+    Read-only, memory-mapped item catalog holding each item's API JSON as raw bytes.
+
+    Lookups binary-search the on-disk offset index and return a memoryview into the
+    mapping, so serving an item costs no JSON parsing or copying. The file is replaced
+    atomically by build_item_blob_catalog() and picked up again here on the next lookup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._mtime: Optional[float] = None
+        self._last_check = float("-inf")
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self) -> None:
+        """(Re)map the catalog file if it appeared or changed since we last looked"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._mmap, self._count, self._mtime = None, 0, None
+            return
+        mtime = stat.st_mtime
+        if mtime == self._mtime:
+            return
+
+        mapped = None
+        try:
+            if stat.st_size < HEADER.size:
+                raise ValueError("file is empty or truncated")
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError("bad header")
+            if len(mapped) < HEADER.size + count * INDEX_ENTRY.size:
+                raise ValueError("index is truncated")
+        except (OSError, ValueError, struct.error) as e:
+            if mapped is not None:
+                mapped.close()
+            logger.error(f"Ignoring item catalog {self.path}: {str(e)}")
+            # Served like a missing catalog until the file changes again
+            self._mmap, self._count, self._mtime = None, 0, mtime
+            return
+        # The previous mapping is left to the GC; memoryviews handed out may still point into it
+        self._mmap, self._count, self._mtime = mapped, count, mtime
+        logger.info(f"Mapped item catalog {self.path} with {count} items")
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_check >= RELOAD_CHECK_SECONDS:
+            self._last_check = now
+            self._open()
+
+    def refresh(self) -> None:
+        """Pick up a rebuilt catalog file right away instead of on the next periodic check"""
+        self._last_check = time.monotonic()
+        self._open()
+
+    def get(self, item_id: int) -> Optional[memoryview]:
+        """Raw JSON bytes for an item, or None if the catalog doesn't have it"""
+        self._maybe_reload()
+        mapped = self._mmap
+        if mapped is None:
+            self.misses += 1
+            return None
+
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, offset, length = INDEX_ENTRY.unpack_from(mapped, HEADER.size + middle * INDEX_ENTRY.size)
+            if entry_id < item_id:
+                low = middle + 1
+            elif entry_id > item_id:
+                high = middle
+            else:
+                self.hits += 1
+                return memoryview(mapped)[offset:offset + length]
+        self.misses += 1
+        return None
+
+    @property
+    def available(self) -> bool:
+        self._maybe_reload()
+        return self._mmap is not None
+
+    def stats(self) -> dict:
+        """Catalog size and hit/miss counters (for monitoring)"""
+        return {"items": self._count, "hits": self.hits, "misses": self.misses}
+
+def build_item_blob_catalog(db: Session, path: str) -> int:
+    """
+    Write every row of the items table into a new catalog file and atomically swap it
+    into place. Items are streamed from the DB, so memory use is bounded by the index.
+    Returns the number of items written.
+    """
+    data_path = f"{path}.data.tmp"
+    final_tmp_path = f"{path}.tmp"
+    index = []
+    offset = 0
+    with open(data_path, "wb") as data_file:
+        for item in db.query(Item).order_by(Item.id).yield_per(1000):
+            blob = json.dumps(item.to_dict(), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            data_file.write(blob)
+            index.append((item.id, offset, len(blob)))
+            offset += len(blob)
+
+    data_start = HEADER.size + len(index) * INDEX_ENTRY.size
+    with open(final_tmp_path, "wb") as out, open(data_path, "rb") as data_file:
+        out.write(HEADER.pack(MAGIC, len(index)))
+        for item_id, blob_offset, length in index:
+            out.write(INDEX_ENTRY.pack(item_id, data_start + blob_offset, length))
+        shutil.copyfileobj(data_file, out)
+    os.remove(data_path)
+    os.replace(final_tmp_path, path)
+    logger.info(f"Built item catalog {path} with {len(index)} items ({offset} bytes of JSON)")
+    return len(index)
+
+item_blob_catalog = ItemBlobCatalog(Settings.ITEM_BLOB_CATALOG_PATH)
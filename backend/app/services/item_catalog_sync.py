@@ -0,0 +1,179 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import logging
+
+from app.config import Settings
+from app import database
+from app.db_writer import db_writer
+from app.gw2_client import get_gw2_client, ITEMS_PER_REQUEST
+from app.models.item import Item
+from app.models.sync_checkpoint import SyncCheckpoint
+from app.rate_limiter import Priority
+from app.services.missing_item_cache import missing_item_cache
+from app.services.item_blob_catalog import item_blob_catalog, build_item_blob_catalog
+from app.services.item_search_index import item_search_index
+from app.services.ingest_lease import ingest_leases, ITEM_CATALOG_LEASE
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "item_catalog"
+PROGRESS_LOG_EVERY = 25  # chunks
+
+class ItemCatalogSync:
+    """
+    Background job that mirrors the whole /v2/items catalog into the items table.
+
+    A run fetches the ID list, skips every ID already stored, then fetches the rest
+    ITEMS_PER_REQUEST at a time in the BULK rate-limit lane, so only one chunk of item
+    payloads is ever held in memory. Each chunk is stored together with the checkpoint
+    (the last finished ID) as one unit of work for the database writer; an interrupted
+    run resumes after it instead of re-requesting IDs the API already declined to return.
+    Reading the stored IDs runs in a thread, so the event loop keeps serving requests.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.status: Dict[str, Any] = {"state": "idle"}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        """Start a run in the background. Returns False if one is already running."""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.run())
+        return True
+
+    async def run_forever(self, interval_seconds: float) -> None:
+        """Run the sync now and then every interval_seconds, until cancelled."""
+        while True:
+            if not ingest_leases.owns(ITEM_CATALOG_LEASE):
+                # Another worker runs the sync; check back in case it goes away
+                await asyncio.sleep(Settings.INGEST_LEASE_TTL)
+                continue
+            if not self.running:
+                self._task = asyncio.create_task(self.run())
+            try:
+                await self._task
+            except Exception:
+                pass  # Already logged and recorded in status by run()
+            await asyncio.sleep(interval_seconds)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run one sync pass and return its final status."""
+        self.status = {
+            "state": "running",
+            "started_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "catalog_size": None,
+            "pending": None,
+            "processed": 0,
+            "inserted": 0,
+            "not_returned": 0,
+            "checkpoint": None,
+            "error": None,
+        }
+        try:
+            await self._sync()
+            if self.status["inserted"]:
+                item_search_index.invalidate()
+            if Settings.ITEM_BLOB_CATALOG_ENABLED and (self.status["inserted"] or not item_blob_catalog.available):
+                self.status["state"] = "building_blob_catalog"
+                await asyncio.to_thread(self._build_blob_catalog)
+            self.status["state"] = "completed"
+        except asyncio.CancelledError:
+            self.status["state"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Item catalog sync failed: {str(e)}", exc_info=True)
+            self.status["state"] = "failed"
+            self.status["error"] = str(e)
+        finally:
+            self.status["finished_at"] = datetime.utcnow().isoformat()
+        return self.status
+
+    async def _sync(self) -> None:
+        gw2_client = get_gw2_client()
+        catalog_ids = sorted(await gw2_client.get_item_ids(priority=Priority.BULK))
+        existing_ids = await asyncio.to_thread(self._stored_item_ids)
+        resume_after = await db_writer.submit(self._start_checkpoint)
+        if resume_after is not None:
+            logger.info(f"Item catalog sync: resuming after item {resume_after}")
+
+        pending = [item_id for item_id in catalog_ids if item_id not in existing_ids and item_id > (resume_after or 0)]
+        del existing_ids
+        self.status.update(catalog_size=len(catalog_ids), pending=len(pending), checkpoint=resume_after)
+        logger.info(f"Item catalog sync: {len(catalog_ids)} items in catalog, {len(pending)} to fetch")
+
+        for chunk_number, start in enumerate(range(0, len(pending), ITEMS_PER_REQUEST), start=1):
+            chunk = pending[start:start + ITEMS_PER_REQUEST]
+            api_items = list((await gw2_client.get_items(chunk, priority=Priority.BULK)).values())
+            inserted = await db_writer.submit(
+                lambda write_db: self._store_chunk(write_db, api_items, chunk[-1])
+            )
+
+            self.status["processed"] += len(chunk)
+            self.status["inserted"] += inserted
+            self.status["not_returned"] += len(chunk) - len(api_items)
+            self.status["checkpoint"] = chunk[-1]
+            if chunk_number % PROGRESS_LOG_EVERY == 0:
+                logger.info(f"Item catalog sync: {self.status['processed']}/{len(pending)} processed, {self.status['inserted']} inserted")
+
+        await db_writer.submit(self._finish_checkpoint)
+        logger.info(f"Item catalog sync finished: {self.status['inserted']} items inserted, {self.status['not_returned']} not returned by the API")
+
+    @staticmethod
+    def _stored_item_ids() -> Set[int]:
+        """Every item ID already in the DB (blocking; run in a thread)"""
+        db = database.SessionLocal()
+        try:
+            return {item_id for (item_id,) in db.query(Item.id)}
+        finally:
+            db.close()
+
+    @staticmethod
+    def _start_checkpoint(db: Session) -> Optional[int]:
+        """Mark a run as started (unless resuming one) and return the ID to resume after. A database writer unit."""
+        checkpoint = SyncCheckpoint.get_or_create(db, CHECKPOINT_NAME)
+        if checkpoint.position is None:
+            checkpoint.started_at = datetime.utcnow()
+        return checkpoint.position
+
+    @staticmethod
+    def _finish_checkpoint(db: Session) -> None:
+        checkpoint = SyncCheckpoint.get_or_create(db, CHECKPOINT_NAME)
+        checkpoint.position = None
+        checkpoint.completed_at = datetime.utcnow()
+
+    @staticmethod
+    def _build_blob_catalog() -> None:
+        """Rebuild the memory-mapped item catalog from the items table (runs in a worker thread)"""
+        db = database.SessionLocal()
+        try:
+            build_item_blob_catalog(db, Settings.ITEM_BLOB_CATALOG_PATH)
+        finally:
+            db.close()
+        item_blob_catalog.refresh()
+
+    @staticmethod
+    def _store_chunk(db: Session, api_items: List[Dict[str, Any]], position: int) -> int:
+        """
+        Insert one chunk of items, leaving rows that already exist untouched, and move the
+        checkpoint past it. A database writer unit; returns the number of rows inserted.
+        """
+        inserted = 0
+        if api_items:
+            stmt = sqlite_insert(Item.__table__).on_conflict_do_nothing(index_elements=["id"])
+            result = db.execute(stmt, [Item.columns_from_api_response(api_data) for api_data in api_items])
+            missing_item_cache.forget(db, [api_data["id"] for api_data in api_items])
+            inserted = result.rowcount
+        SyncCheckpoint.get_or_create(db, CHECKPOINT_NAME).position = position
+        db.flush()
+        return inserted
+
+item_catalog_sync = ItemCatalogSync()
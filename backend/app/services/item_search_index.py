@@ -0,0 +1,199 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import heapq
+import logging
+import time
+
+from app.config import Settings
+from app import database
+from app.models.item import Item
+
+logger = logging.getLogger(__name__)
+
+# Match ranks, best first
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_SUBSTRING = 3
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _word_starts(text: str) -> set:
+    """One- and two-character prefixes of each word, keyed with a leading "^" so they can't collide with trigrams"""
+    keys = set()
+    for i, char in enumerate(text):
+        if char.isalnum() and (i == 0 or not text[i - 1].isalnum()):
+            keys.add("^" + text[i:i + 1])
+            keys.add("^" + text[i:i + 2])
+    return keys
+
+class _NameTable:
+    """The indexed data itself; swapped out as a whole when the index is rebuilt"""
+
+    def __init__(self):
+        self.ids = array("I")
+        self.names: List[str] = []  # lower-cased, used for matching
+        self.rarities: List[str] = []
+        self.types: List[str] = []
+        self.positions: Dict[int, int] = {}  # item id -> position
+        self.postings: Dict[str, array] = {}  # trigram or word-start key -> positions, ascending
+
+    def add(self, item_id: int, name: str, rarity: str, item_type: str) -> None:
+        if item_id in self.positions:
+            return
+        position = len(self.ids)
+        name = (name or "").lower()
+        self.ids.append(item_id)
+        self.names.append(name)
+        self.rarities.append((rarity or "").lower())
+        self.types.append((item_type or "").lower())
+        self.positions[item_id] = position
+        for key in _trigrams(name) | _word_starts(name):
+            postings = self.postings.get(key)
+            if postings is None:
+                postings = self.postings[key] = array("I")
+            postings.append(position)
+
+class ItemSearchIndex:
+    """
+    In-memory name index over the items table for live search.
+
+    Names are lower-cased and broken into trigrams; each trigram maps to the positions of
+    the items containing it. A query of three or more characters only looks at items that
+    contain all of its trigrams; shorter queries only match at the start of a word and
+    are looked up by their word-start key.
+    The index is built lazily from the DB, extended as new items are stored and rebuilt
+    after a catalog sync. Items can also be stored by other processes (another worker, or
+    the ingest process with INGEST_MODE=external), so at most every
+    ITEM_SEARCH_INDEX_CHECK_INTERVAL seconds a search compares the number of stored items
+    with the index and rebuilds it when they differ.
+    """
+
+    def __init__(self):
+        self._table = _NameTable()
+        self._built = False
+        self._stale = False
+        self._next_check = 0.0  # monotonic time of the next comparison with the items table
+        self._build_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._table.ids)
+
+    def _build(self) -> None:
+        """Load every item name from the DB into a fresh table (blocking; run in a thread)"""
+        started = time.monotonic()
+        table = _NameTable()
+        db = database.SessionLocal()
+        try:
+            rows = db.query(Item.id, Item.name, Item.rarity, Item.type).yield_per(5000)
+            for item_id, name, rarity, item_type in rows:
+                table.add(item_id, name, rarity, item_type)
+        finally:
+            db.close()
+        # Searches keep using the old table until the new one is complete
+        self._table = table
+        self._built = True
+        self._stale = False
+        self._next_check = time.monotonic() + Settings.ITEM_SEARCH_INDEX_CHECK_INTERVAL
+        logger.info(f"Built item search index: {len(table.ids)} items, {len(table.postings)} keys in {time.monotonic() - started:.2f}s")
+
+    @staticmethod
+    def _stored_count() -> int:
+        """Number of items in the DB (blocking; run in a thread)"""
+        db = database.SessionLocal()
+        try:
+            return db.query(Item.id).count()
+        finally:
+            db.close()
+
+    async def ensure_built(self) -> None:
+        """Build the index on first use, or rebuild it after invalidate() or when the items table changed"""
+        if self._built and not self._stale and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + Settings.ITEM_SEARCH_INDEX_CHECK_INTERVAL
+            # Items are only ever added, so a different count means another process stored some
+            if await asyncio.to_thread(self._stored_count) != len(self._table.ids):
+                self._stale = True
+        if self._built and not self._stale:
+            return
+        async with self._build_lock:
+            if not self._built or self._stale:
+                await asyncio.to_thread(self._build)
+
+    def invalidate(self) -> None:
+        """Rebuild from the DB on the next search (e.g. after a catalog sync)"""
+        self._stale = True
+
+    def add_items(self, items: Iterable[Item]) -> None:
+        """Index newly stored items. A no-op until the index has been built, since the build will load them."""
+        if not self._built:
+            return
+        for item in items:
+            self._table.add(item.id, item.name, item.rarity, item.type)
+
+    @staticmethod
+    def _candidates(table: _NameTable, query: str) -> Iterable[int]:
+        if len(query) < 3:
+            return table.postings.get("^" + query, ())
+        postings = []
+        for trigram in _trigrams(query):
+            positions = table.postings.get(trigram)
+            if positions is None:
+                return ()
+            postings.append(positions)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for positions in postings[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                break
+        return candidates
+
+    @staticmethod
+    def _rank(name: str, query: str) -> Optional[int]:
+        if name == query:
+            return RANK_EXACT
+        if name.startswith(query):
+            return RANK_PREFIX
+        index = name.find(query)
+        if index == -1:
+            return None
+        if not name[index - 1].isalnum():
+            return RANK_WORD_PREFIX
+        return RANK_SUBSTRING
+
+    def search(self, query: str, limit: int = 50, rarity: Optional[str] = None,
+               item_type: Optional[str] = None) -> List[int]:
+        """
+        Item IDs whose name contains query (case-insensitive), best matches first:
+        exact name, then name prefix, then word prefix, then any substring.
+        Ties go to the shorter name, then alphabetically. Queries shorter than three
+        characters only match the start of a word.
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+        rarity = rarity.lower() if rarity else None
+        item_type = item_type.lower() if item_type else None
+
+        table = self._table
+        matches: List[Tuple[int, int, str, int]] = []
+        for position in self._candidates(table, query):
+            if rarity is not None and table.rarities[position] != rarity:
+                continue
+            if item_type is not None and table.types[position] != item_type:
+                continue
+            name = table.names[position]
+            rank = self._rank(name, query)
+            if rank is not None:
+                matches.append((rank, len(name), name, table.ids[position]))
+
+        return [item_id for _, _, _, item_id in heapq.nsmallest(limit, matches)]
+
+    def stats(self) -> dict:
+        """Index size (for monitoring)"""
+        table = self._table
+        return {"items": len(table.ids), "keys": len(table.postings), "built": self._built, "stale": self._stale}
+
+item_search_index = ItemSearchIndex()
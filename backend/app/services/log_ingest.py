@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, List
+import logging
+
+from app.models.guild_logs import LOG_TYPE_MAP, create_log_entry
+
+logger = logging.getLogger(__name__)
+
+DB_IN_CHUNK = 900  # Stay under SQLite's bound-parameter limit on older builds
+
+class LogIngestService:
+    """Stores guild log entries from the API with set-based de-duplication."""
+
+    @staticmethod
+    def existing_log_ids(db: Session, log_model_cls, guild_id: str, log_ids: List[int]) -> set:
+        """IDs among log_ids already stored for this guild, looked up with IN queries"""
+        existing = set()
+        for i in range(0, len(log_ids), DB_IN_CHUNK):
+            chunk = log_ids[i:i + DB_IN_CHUNK]
+            rows = db.query(log_model_cls.id).filter(
+                log_model_cls.guild_id == guild_id,
+                log_model_cls.id.in_(chunk)
+            )
+            existing.update(log_id for (log_id,) in rows)
+        return existing
+
+    @staticmethod
+    def ingest_logs(db: Session, guild_id: str, log_entries: List[dict]) -> List[dict]:
+        """
+        Add the log entries not yet stored for the guild and flush once.
+
+        Entries are grouped by log type so each log table is checked with a single IN
+        query, and all new rows are inserted in one flush. The caller commits.
+        Returns the API entries that were newly added, in payload order.
+        """
+        by_type: Dict[str, Dict[int, dict]] = defaultdict(dict)
+        for log_entry in log_entries:
+            log_type = log_entry["type"]
+            if log_type not in LOG_TYPE_MAP:
+                logger.warning(f"Unknown log type: {log_type} for guild {guild_id}")
+                continue
+            by_type[log_type].setdefault(log_entry["id"], log_entry)
+
+        new_ids = set()
+        new_rows = []
+        for log_type, entries in by_type.items():
+            existing = LogIngestService.existing_log_ids(db, LOG_TYPE_MAP[log_type], guild_id, list(entries))
+            for log_id, log_entry in entries.items():
+                if log_id not in existing:
+                    new_rows.append(create_log_entry(guild_id, log_entry))
+                    new_ids.add((log_type, log_id))
+
+        if new_rows:
+            db.add_all(new_rows)
+            db.flush()
+
+        new_entries = []
+        for log_entry in log_entries:
+            key = (log_entry["type"], log_entry["id"])
+            if key in new_ids:
+                new_entries.append(log_entry)
+                new_ids.discard(key)  # Report a duplicated payload entry only once
+        return new_entries
@@ -0,0 +1,111 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Set
+import logging
+
+from app.config import Settings
+from app.models.item import MissingItem
+
+logger = logging.getLogger(__name__)
+
+DB_IN_CHUNK = 900  # Stay under SQLite's bound-parameter limit on older builds
+
+class MissingItemCache:
+    """
+    Negative cache for item IDs the GW2 API reports as unknown (removed or hidden items
+    that still show up in stash logs). Entries are persisted in the missing_items table
+    and mirrored in memory, so a known-missing ID costs neither a query nor an API call
+    until its TTL runs out. IDs the mirror doesn't know are looked up in the table, since
+    another process (worker or ingest process) may have recorded them.
+    """
+
+    def __init__(self, ttl: timedelta):
+        self.ttl = ttl
+        self._expires_at: Dict[int, datetime] = {}
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """Populate the in-memory mirror from the DB on first use"""
+        if self._loaded:
+            return
+        now = datetime.utcnow()
+        rows = db.query(MissingItem.id, MissingItem.expires_at).filter(MissingItem.expires_at > now).all()
+        self._expires_at = {item_id: expires_at for item_id, expires_at in rows}
+        self._loaded = True
+        logger.info(f"Loaded {len(self._expires_at)} negatively cached item IDs")
+
+    def known_missing(self, db: Session, item_ids: Iterable[int]) -> Set[int]:
+        """Return the subset of item_ids that the API recently reported as unknown"""
+        self._ensure_loaded(db)
+        now = datetime.utcnow()
+        missing = set()
+        unknown = []
+        for item_id in item_ids:
+            expires_at = self._expires_at.get(item_id)
+            if expires_at and expires_at > now:
+                missing.add(item_id)
+                self.hits += 1
+            else:
+                if expires_at:
+                    del self._expires_at[item_id]
+                unknown.append(item_id)
+        if unknown:
+            # Only IDs that aren't stored get here, and they're about to cost an API call otherwise
+            rows = []
+            for i in range(0, len(unknown), DB_IN_CHUNK):
+                rows.extend(db.query(MissingItem.id, MissingItem.expires_at).filter(
+                    MissingItem.id.in_(unknown[i:i + DB_IN_CHUNK]), MissingItem.expires_at > now
+                ))
+            for item_id, expires_at in rows:
+                self._expires_at[item_id] = expires_at
+                missing.add(item_id)
+            self.hits += len(rows)
+            self.misses += len(unknown) - len(rows)
+        return missing
+
+    def is_missing(self, db: Session, item_id: int) -> bool:
+        """Check a single item ID against the negative cache"""
+        return item_id in self.known_missing(db, [item_id])
+
+    def record_missing(self, db: Session, item_ids: Iterable[int]) -> None:
+        """Remember IDs the API just answered 404 for. Runs in the caller's transaction."""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        self._ensure_loaded(db)
+        now = datetime.utcnow()
+        expires_at = now + self.ttl
+        stmt = sqlite_insert(MissingItem)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MissingItem.id],
+            set_={"checked_at": stmt.excluded.checked_at, "expires_at": stmt.excluded.expires_at}
+        )
+        db.execute(stmt, [
+            {"id": item_id, "first_seen_at": now, "checked_at": now, "expires_at": expires_at}
+            for item_id in item_ids
+        ])
+        for item_id in item_ids:
+            self._expires_at[item_id] = expires_at
+        logger.info(f"Negatively cached {len(item_ids)} unknown item IDs until {expires_at.isoformat()}")
+
+    def forget(self, db: Session, item_ids: Iterable[int]) -> None:
+        """Drop IDs that turned out to exist after all. Runs in the caller's transaction."""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        db.query(MissingItem).filter(MissingItem.id.in_(item_ids)).delete(synchronize_session=False)
+        for item_id in item_ids:
+            self._expires_at.pop(item_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters (for monitoring)"""
+        return {
+            "entries": len(self._expires_at),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+missing_item_cache = MissingItemCache(ttl=timedelta(hours=Settings.MISSING_ITEM_TTL_HOURS))
@@ -30,7 +30,7 @@ class ModerationService:
         severity: Optional[int] = None,
         details: Optional[str] = None
     ) -> ModAction:
-        """Create a moderation action, creating account if needed."""
+        """Create a moderation action, creating account if needed. The caller commits."""
         
         # Get action type info
         action_info = get_action_type_info(action_type)
@@ -118,7 +118,7 @@ class ModerationService:
         mod_action.auto_disabled_account = auto_disabled
         
         db.add(mod_action)
-        db.commit()
+        db.flush()
         
         logger.info(
             f"Created {action_type} for {account_name} "
@@ -134,7 +134,7 @@ class ModerationService:
         mod_action_id: int,
         lifted_by_user_id: int
     ) -> ModAction:
-        """Lift a moderation action."""
+        """Lift a moderation action. The caller commits."""
         mod_action = db.query(ModAction).filter(ModAction.id == mod_action_id).first()
         
         if not mod_action:
@@ -157,7 +157,7 @@ class ModerationService:
                 logger.info(f"Re-enabled account {mod_action.account_name} after lifting action")
         
         mod_action.lift(lifted_by_user_id)
-        db.commit()
+        db.flush()
         
         logger.info(f"Lifted mod action {mod_action_id} by user {lifted_by_user_id}")
         
@@ -264,7 +264,7 @@ class ModerationService:
     
     @staticmethod
     def expire_old_actions(db: Session) -> int:
-        """Mark expired temporary actions as inactive. Returns count of expired actions."""
+        """Mark expired temporary actions as inactive. Returns count of expired actions. The caller commits."""
         now = datetime.utcnow()
         
         expired_actions = db.query(ModAction).filter(
@@ -279,7 +279,7 @@ class ModerationService:
             count += 1
         
         if count > 0:
-            db.commit()
+            db.flush()
             logger.info(f"Expired {count} moderation actions")
         
         return count 
\ No newline at end of file
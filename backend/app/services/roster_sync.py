@@ -0,0 +1,171 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+from app.models.account import Account
+from app.models.account_name_history import AccountNameHistory
+from app.models.guild_membership import guild_memberships
+from app.models.guild_standing import GuildStanding
+
+logger = logging.getLogger(__name__)
+
+DB_IN_CHUNK = 900  # Stay under SQLite's bound-parameter limit on older builds
+
+class RosterDiff:
+    """Account names that joined, left or changed rank/details in one roster sync"""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.removed: List[str] = []
+        self.changed: List[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def to_dict(self):
+        """Convert the diff to a dictionary."""
+        return {"added": self.added, "removed": self.removed, "changed": self.changed}
+
+class RosterSyncService:
+    """Writes a guild's API member list to accounts and guild_memberships in bulk."""
+
+    @staticmethod
+    def _account_ids_by_name(db: Session, names: List[str]) -> Dict[str, int]:
+        account_ids: Dict[str, int] = {}
+        for i in range(0, len(names), DB_IN_CHUNK):
+            chunk = names[i:i + DB_IN_CHUNK]
+            rows = db.query(Account.id, Account.current_account_name).filter(Account.current_account_name.in_(chunk))
+            account_ids.update((name, account_id) for account_id, name in rows)
+        return account_ids
+
+    @staticmethod
+    def _account_ids_in(db: Session, column, account_ids: List[int]) -> set:
+        """The given account IDs that already have a row in column's table"""
+        found = set()
+        for i in range(0, len(account_ids), DB_IN_CHUNK):
+            found.update(row[0] for row in db.query(column).filter(column.in_(account_ids[i:i + DB_IN_CHUNK])).distinct())
+        return found
+
+    @staticmethod
+    def get_or_create_accounts(db: Session, account_names: List[str], source: str = "guild_sync") -> Dict[str, int]:
+        """
+        Map account names to account IDs, creating the accounts that don't exist yet.
+        New accounts get their initial name history and standing rows, like
+        Account.get_or_create, but each table gets a single batched insert. The caller commits.
+        """
+        names = list(dict.fromkeys(account_names))
+        account_ids = RosterSyncService._account_ids_by_name(db, names)
+        missing = [name for name in names if name not in account_ids]
+        if not missing:
+            return account_ids
+
+        now = datetime.utcnow()
+        stmt = sqlite_insert(Account.__table__).on_conflict_do_nothing(index_elements=["current_account_name"])
+        db.execute(stmt, [
+            {"current_account_name": name, "account_source": source, "created_at": now, "updated_at": now}
+            for name in missing
+        ])
+        created = RosterSyncService._account_ids_by_name(db, missing)
+
+        # Another process may have inserted some of these accounts, with their history and
+        # standing, since they were looked up; only fill in the rows that are still missing
+        ids = list(created.values())
+        with_history = RosterSyncService._account_ids_in(db, AccountNameHistory.account_id, ids)
+        with_standing = RosterSyncService._account_ids_in(db, GuildStanding.account_id, ids)
+        history_rows = [
+            {"account_id": account_id, "account_name": name, "valid_from": now, "created_at": now}
+            for name, account_id in created.items() if account_id not in with_history
+        ]
+        standing_rows = [{"account_id": account_id} for account_id in ids if account_id not in with_standing]
+        if history_rows:
+            db.execute(AccountNameHistory.__table__.insert(), history_rows)
+        if standing_rows:
+            db.execute(GuildStanding.__table__.insert(), standing_rows)
+
+        logger.info(f"Created {len(history_rows)} new accounts from guild roster")
+        account_ids.update(created)
+        return account_ids
+
+    @staticmethod
+    def _membership_row(guild_id: str, account_id: int, member_data: dict) -> dict:
+        joined_date = None
+        if member_data.get("joined"):
+            # Stored naive (UTC), which is also how SQLite hands it back for comparison
+            joined_date = datetime.fromisoformat(member_data["joined"].replace('Z', '+00:00')).replace(tzinfo=None)
+        return {
+            "account_id": account_id,
+            "guild_id": guild_id,
+            "rank": member_data["rank"],
+            "joined": joined_date,
+            "wvw_member": bool(member_data.get("wvw_member", False)),
+        }
+
+    @staticmethod
+    def upsert_memberships(db: Session, rows: List[dict]) -> None:
+        """Insert or update the given guild_memberships rows with one statement. The caller commits."""
+        if not rows:
+            return
+        stmt = sqlite_insert(guild_memberships)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[guild_memberships.c.account_id, guild_memberships.c.guild_id],
+            set_={
+                "rank": stmt.excluded.rank,
+                "joined": stmt.excluded.joined,
+                "wvw_member": stmt.excluded.wvw_member,
+            }
+        )
+        db.execute(stmt, rows)
+
+    @staticmethod
+    def sync_members(db: Session, guild_id: str, members: List[dict]) -> RosterDiff:
+        """
+        Bring the guild's membership rows in line with the API member list.
+
+        The current rows are diffed against the list and only the deltas are written:
+        new and changed members are upserted, members no longer listed are deleted.
+        Everything runs in the caller's transaction. Returns the diff.
+        """
+        account_ids = RosterSyncService.get_or_create_accounts(db, [member_data["name"] for member_data in members])
+
+        current = {
+            account_id: (name, {"rank": rank, "joined": joined, "wvw_member": bool(wvw_member)})
+            for account_id, name, rank, joined, wvw_member in db.query(
+                guild_memberships.c.account_id,
+                Account.current_account_name,
+                guild_memberships.c.rank,
+                guild_memberships.c.joined,
+                guild_memberships.c.wvw_member,
+            ).join(Account, Account.id == guild_memberships.c.account_id).filter(guild_memberships.c.guild_id == guild_id)
+        }
+
+        diff = RosterDiff()
+        rows = []
+        listed = set()
+        for member_data in members:
+            account_id = account_ids[member_data["name"]]
+            if account_id in listed:
+                continue
+            listed.add(account_id)
+            row = RosterSyncService._membership_row(guild_id, account_id, member_data)
+            if account_id not in current:
+                diff.added.append(member_data["name"])
+                rows.append(row)
+            elif any(current[account_id][1][field] != row[field] for field in ("rank", "joined", "wvw_member")):
+                diff.changed.append(member_data["name"])
+                rows.append(row)
+
+        departed = [account_id for account_id in current if account_id not in listed]
+        diff.removed = [current[account_id][0] for account_id in departed]
+
+        RosterSyncService.upsert_memberships(db, rows)
+        for i in range(0, len(departed), DB_IN_CHUNK):
+            db.execute(guild_memberships.delete().where(
+                guild_memberships.c.guild_id == guild_id,
+                guild_memberships.c.account_id.in_(departed[i:i + DB_IN_CHUNK])
+            ))
+
+        if diff:
+            logger.info(f"Roster sync for guild {guild_id}: {len(diff.added)} joined, {len(diff.removed)} left, {len(diff.changed)} changed")
+        return diff
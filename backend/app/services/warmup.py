@@ -0,0 +1,93 @@
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+import asyncio
+import logging
+
+from app.config import Settings
+from app import database
+from app.models.guild import Guild
+from app.services.guild_ingest import GUILD_IDS, guild_update_locks, update_guild
+from app.services.ingest_lease import ingest_leases
+
+logger = logging.getLogger(__name__)
+
+class DatabaseWarmup:
+    """
+    Brings the tracked guilds up to date after startup, in the background.
+
+    The app serves whatever is already in the database while this runs. Guilds that are
+    already stored are updated incrementally from their last_log_id watermark; only guilds
+    missing from the database (or every guild, with WARMUP_FORCE_FULL_REFRESH) get a full
+    forced refresh. Guilds whose ingest lease belongs to another worker are left to that
+    worker. `ready` turns True once every guild has been attempted.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.status: Dict[str, Any] = {"state": "pending"}
+
+    @property
+    def ready(self) -> bool:
+        return self.status["state"] in ("completed", "delegated")
+
+    def delegate(self) -> None:
+        """Mark the warmup as another process's job (INGEST_MODE=external); this process is ready at once."""
+        self.status = {"state": "delegated"}
+
+    def start(self) -> asyncio.Task:
+        """Run the warmup in the background. Called from the app lifespan."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self) -> None:
+        """Warm every tracked guild concurrently (each under its own update lock)."""
+        self.status = {
+            "state": "running",
+            "started_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "full_refresh": [],
+            "incremental": [],
+            "failed": [],
+            "other_worker": [],
+        }
+        logger.info("Warming up database with guild data in the background...")
+        stored = await asyncio.to_thread(self._stored_guild_ids)
+
+        self.status["other_worker"] = [guild_id for guild_id in GUILD_IDS if not ingest_leases.owns(guild_id)]
+        await asyncio.gather(*(
+            self._warm_guild(guild_id, full_refresh=Settings.WARMUP_FORCE_FULL_REFRESH or guild_id not in stored)
+            for guild_id in GUILD_IDS if ingest_leases.owns(guild_id)
+        ))
+
+        self.status["state"] = "completed"
+        self.status["finished_at"] = datetime.utcnow().isoformat()
+        logger.info(f"Database warmup completed: {len(self.status['full_refresh'])} full, "
+                    f"{len(self.status['incremental'])} incremental, {len(self.status['failed'])} failed")
+
+    @staticmethod
+    def _stored_guild_ids() -> Set[str]:
+        db = database.SessionLocal()
+        try:
+            return {guild_id for (guild_id,) in db.query(Guild.id).filter(Guild.id.in_(GUILD_IDS))}
+        finally:
+            db.close()
+
+    async def _warm_guild(self, guild_id: str, full_refresh: bool) -> None:
+        async with guild_update_locks[guild_id]:
+            logger.info(f"Warmup: updating guild {guild_id} ({'full refresh' if full_refresh else 'incremental'})")
+            try:
+                # An incremental warmup fetches new logs plus whatever refresh tiers have expired
+                await update_guild(guild_id, force_refresh_logs=full_refresh)
+                self.status["full_refresh" if full_refresh else "incremental"].append(guild_id)
+            except Exception as e:
+                # Already logged by update_guild; one failing guild doesn't hold up the others
+                logger.error(f"Warmup: error updating guild {guild_id}: {str(e)}")
+                self.status["failed"].append(guild_id)
+
+database_warmup = DatabaseWarmup()
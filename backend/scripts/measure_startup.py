@@ -0,0 +1,87 @@
+"""
+Measure import time of the backend modules and the server's time to first request.
+
+Run from the backend directory (inside the container, or anywhere the requirements
+and the database directory are available):
+
+    python scripts/measure_startup.py [--runs 5] [--port 8099] [--skip-server]
+
+Every import is timed in a fresh interpreter so nothing is already cached in
+sys.modules. Time to first request starts uvicorn in a subprocess and polls
+/api/health until it answers.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "app",
+    "app.database",
+    "app.models",
+    "app.gw2_client",
+    "app.api.guilds",
+    "app.server",
+]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+def time_import(module: str) -> float:
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return float(completed.stdout.strip().splitlines()[-1])
+
+def time_first_request(port: int, timeout: float = 120.0) -> float:
+    url = f"http://127.0.0.1:{port}/api/health"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.server:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"No response from {url} within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="repetitions per measurement (median is reported)")
+    parser.add_argument("--port", type=int, default=8099, help="port for the time-to-first-request server")
+    parser.add_argument("--skip-server", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+
+    print(f"{'measurement':<32}{'median':>10}{'min':>10}{'max':>10}")
+    for module in MODULES:
+        try:
+            samples = [time_import(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            # e.g. an optional server dependency that isn't installed; the other modules can still be measured
+            print(f"{'import ' + module:<32}  failed: {e}")
+            continue
+        print(f"{'import ' + module:<32}{statistics.median(samples) * 1000:>8.1f}ms{min(samples) * 1000:>8.1f}ms{max(samples) * 1000:>8.1f}ms")
+
+    if not args.skip_server:
+        samples = [time_first_request(args.port) for _ in range(args.runs)]
+        print(f"{'time to first request':<32}{statistics.median(samples) * 1000:>8.1f}ms{min(samples) * 1000:>8.1f}ms{max(samples) * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
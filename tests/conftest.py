@@ -0,0 +1,59 @@
+"""Fixtures shared by the backend tests."""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, begin_immediate, set_reader_pragma, set_sqlite_pragma, set_writer_pragma
+
+
+@pytest.fixture
+def anyio_backend():
+    """Run the async tests (marked anyio) on asyncio, like the app"""
+    return "asyncio"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "guild.db"
+
+
+@pytest.fixture
+def engine(db_path):
+    """Engine on a fresh SQLite file with every table created, set up like the app's"""
+    import app.models  # noqa: F401  (registers the tables on Base)
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", set_sqlite_pragma)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def writer_session_factory(engine, db_path):
+    """Session factory for a DatabaseWriter, configured like the app's write engine"""
+    write_engine = create_engine(
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False}, pool_size=1, max_overflow=0
+    )
+    event.listen(write_engine, "connect", set_writer_pragma)
+    event.listen(write_engine, "begin", begin_immediate)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=write_engine, expire_on_commit=False)
+    write_engine.dispose()
+
+
+@pytest.fixture
+async def async_db(engine, db_path):
+    """AsyncSession on the same file, configured like the app's async read engine"""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    event.listen(async_engine.sync_engine, "connect", set_reader_pragma)
+    async with async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)() as session:
+        yield session
+    await async_engine.dispose()
@@ -0,0 +1,94 @@
+"""Savepoints, group commit and failure isolation in DatabaseWriter."""
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.config import Settings
+from app.db_writer import DatabaseWriter
+from app.models.guild import Guild
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def writer(writer_session_factory):
+    writer = DatabaseWriter(session_factory=writer_session_factory)
+    yield writer
+    await writer.stop()
+
+
+def add_guild(guild_id):
+    def unit(db):
+        guild = Guild(id=guild_id, name=f"Guild {guild_id}", tag=guild_id[:4].upper())
+        db.add(guild)
+        db.flush()
+        return guild
+    return unit
+
+
+def failing_unit(db):
+    add_guild("rolled-back")(db)
+    raise RuntimeError("unit failed")
+
+
+def stored_guild_ids(db):
+    db.expire_all()
+    return sorted(guild_id for (guild_id,) in db.query(Guild.id))
+
+
+async def test_commits_units_and_returns_their_results(writer, db):
+    assert await writer.submit(lambda db: 42) == 42
+    guild = await writer.submit(add_guild("one"))
+
+    # Returned objects are detached but keep their loaded attributes
+    assert (guild.id, guild.name) == ("one", "Guild one")
+    assert stored_guild_ids(db) == ["one"]
+
+
+async def test_concurrent_units_share_one_commit(writer, db, monkeypatch):
+    monkeypatch.setattr(Settings, "WRITE_QUEUE_MAX_BATCH", 5)
+    monkeypatch.setattr(Settings, "WRITE_QUEUE_MAX_WAIT", 1.0)
+    guild_ids = [f"guild-{n}" for n in range(5)]
+    await asyncio.gather(*(writer.submit(add_guild(guild_id)) for guild_id in guild_ids))
+
+    stats = writer.stats()
+    assert (stats["units"], stats["batches"], stats["largest_batch"]) == (5, 1, 5)
+    assert stored_guild_ids(db) == guild_ids
+
+
+async def test_a_failing_unit_is_rolled_back_alone(writer, db, monkeypatch):
+    monkeypatch.setattr(Settings, "WRITE_QUEUE_MAX_BATCH", 3)
+    monkeypatch.setattr(Settings, "WRITE_QUEUE_MAX_WAIT", 1.0)
+    results = await asyncio.gather(
+        writer.submit(add_guild("before")),
+        writer.submit(failing_unit),
+        writer.submit(add_guild("after")),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[1], RuntimeError)
+    assert [guild.id for guild in (results[0], results[2])] == ["before", "after"]
+    stats = writer.stats()
+    assert (stats["batches"], stats["failed_units"], stats["failed_batches"]) == (1, 1, 0)
+    assert stored_guild_ids(db) == ["after", "before"]
+
+
+async def test_a_unit_conflicting_with_an_earlier_one_fails_alone(writer, db):
+    await writer.submit(add_guild("taken"))
+    with pytest.raises(IntegrityError):
+        await writer.submit(add_guild("taken"))
+
+    await writer.submit(add_guild("next"))
+    assert stored_guild_ids(db) == ["next", "taken"]
+
+
+async def test_stop_applies_what_is_already_queued(writer_session_factory, db):
+    writer = DatabaseWriter(session_factory=writer_session_factory)
+    pending = [asyncio.ensure_future(writer.submit(add_guild(f"queued-{n}"))) for n in range(3)]
+    await asyncio.sleep(0)  # Let the submits enqueue
+    await writer.stop()
+
+    await asyncio.gather(*pending)
+    assert not writer.running
+    assert stored_guild_ids(db) == ["queued-0", "queued-1", "queued-2"]
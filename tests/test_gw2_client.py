@@ -0,0 +1,91 @@
+"""429 and Retry-After handling of GW2Client requests."""
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.config import Settings
+from app.gw2_client import GW2Client, GW2RateLimitError
+
+pytestmark = pytest.mark.anyio
+
+URL = "https://api.example.test/v2/guild/abc"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Settings, "GW2_CACHE_ENABLED", False)
+    monkeypatch.setattr(Settings, "GW2_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(GW2Client, "_load_api_key", lambda self: "test-key")
+    return GW2Client()
+
+
+def serve(client: GW2Client, responses):
+    """Answer the client's requests with the given responses in order; returns the request log"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return requests
+
+
+async def test_retries_after_429_and_honours_retry_after(client):
+    requests = serve(client, [
+        httpx.Response(429, headers={"Retry-After": "0.2"}),
+        httpx.Response(200, json={"id": "abc"}),
+    ])
+    started = time.monotonic()
+    response = await client.request(URL)
+    await client.aclose()
+
+    assert response.status_code == 200
+    assert len(requests) == 2
+    assert time.monotonic() - started >= 0.2
+    # The cooldown was fed back into the shared limiter
+    assert client.rate_limiter.blocked_until >= started + 0.2
+
+
+async def test_gives_up_after_max_retries(client, monkeypatch):
+    monkeypatch.setattr(Settings, "GW2_MAX_RETRIES", 2)
+    requests = serve(client, [httpx.Response(429, headers={"Retry-After": "0"})])
+    with pytest.raises(GW2RateLimitError) as error:
+        await client.request(URL)
+    await client.aclose()
+
+    assert len(requests) == 3
+    assert error.value.url == URL
+
+
+async def test_sends_the_api_key_unless_headers_are_given(client):
+    requests = serve(client, [httpx.Response(200, json={})])
+    await client.request(URL)
+    await client.request(URL, headers={"Authorization": "Bearer user-key"})
+    await client.request(URL, authenticated=False)
+    await client.aclose()
+
+    assert [request.headers.get("Authorization") for request in requests] == [
+        "Bearer test-key", "Bearer user-key", None
+    ]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("3", 3.0),
+    ("-5", 0.0),
+    ("soon", Settings.GW2_BACKOFF_BASE * 4),
+    (None, Settings.GW2_BACKOFF_BASE * 4),
+])
+def test_retry_after_seconds(header, expected):
+    headers = {"Retry-After": header} if header is not None else {}
+    response = httpx.Response(429, headers=headers)
+    assert GW2Client._retry_after_seconds(response, attempt=2) == expected
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    response = httpx.Response(429, headers={"Retry-After": format_datetime(retry_at, usegmt=True)})
+    assert 25 < GW2Client._retry_after_seconds(response, attempt=0) <= 30
@@ -0,0 +1,82 @@
+"""Set-based de-duplication in LogIngestService.ingest_logs."""
+import pytest
+
+from app.models.guild import Guild
+from app.models.guild_logs import JoinLog, KickLog
+from app.services.log_ingest import LogIngestService
+
+GUILD_ID = "guild-1"
+
+
+def joined(log_id, user="Someone.1234"):
+    return {"id": log_id, "time": "2024-01-01T12:00:00Z", "type": "joined", "user": user}
+
+
+def kick(log_id, user="Someone.1234"):
+    return {"id": log_id, "time": "2024-01-01T12:00:00Z", "type": "kick", "user": user, "kicked_by": "Officer.5678"}
+
+
+@pytest.fixture
+def guild_db(db):
+    db.add(Guild(id=GUILD_ID, name="Test Guild", tag="TEST"))
+    db.commit()
+    return db
+
+
+def stored_ids(db, log_model_cls):
+    return sorted(log_id for (log_id,) in db.query(log_model_cls.id).filter(log_model_cls.guild_id == GUILD_ID))
+
+
+def test_adds_new_entries_in_payload_order(guild_db):
+    payload = [joined(3), kick(1), joined(2)]
+    assert LogIngestService.ingest_logs(guild_db, GUILD_ID, payload) == payload
+    guild_db.commit()
+
+    assert stored_ids(guild_db, JoinLog) == [2, 3]
+    assert stored_ids(guild_db, KickLog) == [1]
+
+
+def test_skips_entries_already_stored(guild_db):
+    LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(1), kick(2)])
+    guild_db.commit()
+
+    new_entries = LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(1), kick(2), joined(3)])
+    guild_db.commit()
+
+    assert [entry["id"] for entry in new_entries] == [3]
+    assert stored_ids(guild_db, JoinLog) == [1, 3]
+
+
+def test_reports_an_entry_repeated_in_the_payload_once(guild_db):
+    new_entries = LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(1), joined(1, user="Other.0001")])
+    guild_db.commit()
+
+    assert new_entries == [joined(1)]
+    assert stored_ids(guild_db, JoinLog) == [1]
+
+
+def test_the_same_id_in_different_log_tables_is_not_a_duplicate(guild_db):
+    new_entries = LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(1), kick(1)])
+    assert len(new_entries) == 2
+
+
+def test_ids_are_checked_per_guild(guild_db):
+    guild_db.add(Guild(id="guild-2", name="Other Guild", tag="OTHR"))
+    LogIngestService.ingest_logs(guild_db, "guild-2", [joined(1)])
+    guild_db.commit()
+
+    assert LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(1)]) == [joined(1)]
+
+
+def test_ignores_unknown_log_types(guild_db):
+    payload = [{"id": 1, "time": "2024-01-01T12:00:00Z", "type": "not_a_log_type"}, joined(2)]
+    assert LogIngestService.ingest_logs(guild_db, GUILD_ID, payload) == [joined(2)]
+
+
+def test_checks_existing_ids_in_chunks(guild_db, monkeypatch):
+    monkeypatch.setattr("app.services.log_ingest.DB_IN_CHUNK", 2)
+    LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(log_id) for log_id in range(1, 6)])
+    guild_db.commit()
+
+    new_entries = LogIngestService.ingest_logs(guild_db, GUILD_ID, [joined(log_id) for log_id in range(1, 8)])
+    assert [entry["id"] for entry in new_entries] == [6, 7]
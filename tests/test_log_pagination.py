@@ -0,0 +1,110 @@
+"""Keyset (cursor) and page-number paging of the guild log endpoints."""
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.guild import Guild
+from app.models.guild_logs import JoinLog, KickLog
+
+# app.api pulls in the auth stack, which may not be installed
+guilds = pytest.importorskip("app.api.guilds", exc_type=ImportError)
+
+pytestmark = pytest.mark.anyio
+
+GUILD_IDS = ["guild-a", "guild-b"]
+START = datetime(2024, 1, 1, 12)
+
+
+@pytest.fixture
+def log_keys(db):
+    """Join and kick logs in two guilds, several per timestamp and with the same ids in both guilds; returns their keys newest first"""
+    db.add_all(Guild(id=guild_id, name=guild_id, tag=guild_id[-4:].upper()) for guild_id in GUILD_IDS)
+    keys = []
+    for guild_id in GUILD_IDS:
+        for log_id in range(1, 13):
+            log_time = START + timedelta(hours=log_id // 4)
+            if log_id % 2:
+                db.add(JoinLog(id=log_id, guild_id=guild_id, time=log_time, type="joined", user=f"User.{log_id}"))
+            else:
+                db.add(KickLog(id=log_id, guild_id=guild_id, time=log_time, type="kick", user=f"User.{log_id}", kicked_by="Officer.1"))
+            keys.append((log_time, log_id, guild_id))
+    db.commit()
+    return sorted(keys, reverse=True)
+
+
+def cursor_of(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+async def walk_with_cursor(async_db, limit, **filters):
+    """Every page from the first one on, following next_cursor; returns the keys seen and the number of pages"""
+    keys, cursor, pages = [], None, 0
+    while True:
+        logs, _, cursor = await guilds._page_of_logs(async_db, 1, limit, None, None, cursor=cursor, include_total=False, **filters)
+        keys.extend((log.time, log.id, log.guild_id) for log in logs)
+        pages += 1
+        if cursor is None:
+            return keys, pages
+
+
+def test_cursor_round_trip():
+    log = JoinLog(id=7, guild_id="guild-a", time=START, type="joined")
+    assert guilds.decode_log_cursor(guilds.encode_log_cursor(log)) == (START, 7, "guild-a")
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",
+    "not a cursor",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    cursor_of("2024-01-01T12:00:00"),
+    cursor_of(["2024-01-01T12:00:00", 1]),
+    cursor_of({"time": "2024-01-01T12:00:00", "id": 1, "guild": "guild-a"}),
+    cursor_of(["yesterday", 1, "guild-a"]),
+    cursor_of([None, 1, "guild-a"]),
+    cursor_of(["2024-01-01T12:00:00", "one", "guild-a"]),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        guilds.decode_log_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("limit", [1, 5, 24])
+async def test_cursor_paging_returns_every_log_once_in_order(async_db, log_keys, limit):
+    keys, pages = await walk_with_cursor(async_db, limit)
+    assert keys == log_keys
+    assert pages == -(-len(log_keys) // limit)
+
+
+async def test_cursor_paging_within_a_guild(async_db, log_keys):
+    keys, _ = await walk_with_cursor(async_db, 5, guild_id="guild-b")
+    assert keys == [key for key in log_keys if key[2] == "guild-b"]
+
+
+async def test_cursor_paging_matches_page_numbers(async_db, log_keys):
+    by_cursor, _ = await walk_with_cursor(async_db, 5, guild_id="guild-a")
+    by_page = []
+    for page in range(1, 4):
+        logs, total, _ = await guilds._page_of_logs(async_db, page, 5, None, None, guild_id="guild-a")
+        by_page.extend((log.time, log.id, log.guild_id) for log in logs)
+        assert total == 12
+    assert by_page == by_cursor
+
+
+async def test_filters_by_type_and_user(async_db, log_keys):
+    logs, total, next_cursor = await guilds._page_of_logs(async_db, 1, 50, "kick", "User.1")
+    assert {log.id for log in logs} == {10, 12}
+    assert {log.type for log in logs} == {"kick"}
+    assert (total, next_cursor) == (4, None)
+
+
+async def test_include_total(async_db, log_keys):
+    _, total, next_cursor = await guilds._page_of_logs(async_db, 1, 5, None, None)
+    assert total == len(log_keys)
+    assert next_cursor is not None
+
+    _, total, _ = await guilds._page_of_logs(async_db, 1, 5, None, None, cursor=next_cursor, include_total=False)
+    assert total is None
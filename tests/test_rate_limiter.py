@@ -0,0 +1,99 @@
+"""Token bucket behaviour and priority lanes of TokenBucketRateLimiter."""
+import asyncio
+import time
+
+import pytest
+
+from app.rate_limiter import Priority, TokenBucketRateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_takes_tokens_without_waiting_while_the_bucket_has_them():
+    limiter = TokenBucketRateLimiter(bucket_size=3, refill_rate=0.001)
+    started = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - started < 0.05
+    assert limiter.available_tokens < 1
+
+
+async def test_waits_for_the_refill_once_empty():
+    limiter = TokenBucketRateLimiter(bucket_size=1, refill_rate=10)
+    await limiter.acquire()
+    started = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+async def test_penalize_drains_the_bucket_and_blocks_until_retry_after():
+    limiter = TokenBucketRateLimiter(bucket_size=5, refill_rate=1000)
+    limiter.penalize(0.2)
+    assert limiter.available_tokens == 0
+
+    started = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+
+
+async def test_rejects_more_tokens_than_the_bucket_holds():
+    limiter = TokenBucketRateLimiter(bucket_size=2)
+    with pytest.raises(ValueError):
+        await limiter.acquire(tokens=3)
+
+
+async def queue_up(limiter: TokenBucketRateLimiter, callers):
+    """Queue the (name, priority) callers in order on an empty bucket; returns them in the order they got a token"""
+    served = []
+
+    async def call(name, priority):
+        await limiter.acquire(priority=priority)
+        served.append(name)
+
+    await limiter.acquire()  # Empty the bucket so everyone below has to queue
+    tasks = []
+    for name, priority in callers:
+        tasks.append(asyncio.create_task(call(name, priority)))
+        await asyncio.sleep(0)  # Let it enqueue before the next one arrives
+    return served, tasks
+
+
+async def test_serves_the_most_urgent_lane_first_and_fifo_within_a_lane():
+    limiter = TokenBucketRateLimiter(bucket_size=1, refill_rate=20)
+    served, tasks = await queue_up(limiter, [
+        ("bulk-1", Priority.BULK),
+        ("background-1", Priority.BACKGROUND),
+        ("bulk-2", Priority.BULK),
+        ("interactive-1", Priority.INTERACTIVE),
+        ("background-2", Priority.BACKGROUND),
+        ("interactive-2", Priority.INTERACTIVE),
+    ])
+    await asyncio.gather(*tasks)
+
+    assert served == ["interactive-1", "interactive-2", "background-1", "background-2", "bulk-1", "bulk-2"]
+    stats = limiter.stats()
+    assert stats["interactive"]["queued"] == 2
+    assert stats["bulk"]["max_wait"] >= stats["interactive"]["max_wait"]
+
+
+async def test_a_new_caller_does_not_overtake_queued_callers_of_its_lane():
+    limiter = TokenBucketRateLimiter(bucket_size=2, refill_rate=50)
+    served, tasks = await queue_up(limiter, [("queued", Priority.BACKGROUND)])
+    await limiter.acquire()  # The bucket still has a token, but "queued" asked first
+    served.append("late")
+    await asyncio.gather(*tasks)
+
+    assert served == ["queued", "late"]
+
+
+async def test_a_cancelled_waiter_does_not_hold_up_its_lane():
+    limiter = TokenBucketRateLimiter(bucket_size=1, refill_rate=50)
+    served, tasks = await queue_up(limiter, [
+        ("cancelled", Priority.INTERACTIVE),
+        ("next", Priority.INTERACTIVE),
+    ])
+    tasks[0].cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert served == ["next"]
+    assert limiter.stats()["interactive"]["waiting"] == 0
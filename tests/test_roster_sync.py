@@ -0,0 +1,158 @@
+"""Batched account creation and roster diffing in RosterSyncService."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, func
+
+from app.models.account import Account
+from app.models.account_name_history import AccountNameHistory
+from app.models.guild import Guild
+from app.models.guild_membership import guild_memberships
+from app.models.guild_standing import GuildStanding
+from app.services.roster_sync import RosterSyncService
+
+GUILD_ID = "guild-1"
+
+
+def row_counts(db):
+    return {
+        model.__tablename__: db.query(func.count()).select_from(model).scalar()
+        for model in (Account, AccountNameHistory, GuildStanding)
+    }
+
+
+def add_account(db, name):
+    """An account created the way another writer would, with its history and standing"""
+    account = Account(current_account_name=name)
+    db.add(account)
+    db.flush()
+    db.add_all([AccountNameHistory(account_id=account.id, account_name=name), GuildStanding(account_id=account.id)])
+    db.commit()
+    return account.id
+
+
+def test_creates_missing_accounts_with_history_and_standing(db):
+    account_ids = RosterSyncService.get_or_create_accounts(db, ["One.1111", "Two.2222", "One.1111"])
+    db.commit()
+
+    assert set(account_ids) == {"One.1111", "Two.2222"}
+    assert row_counts(db) == {"accounts": 2, "account_name_history": 2, "guild_standings": 2}
+    history = {row.account_id: row.account_name for row in db.query(AccountNameHistory)}
+    assert history == {account_id: name for name, account_id in account_ids.items()}
+
+
+def test_existing_accounts_are_looked_up_not_created(db):
+    existing_id = add_account(db, "Old.1111")
+    account_ids = RosterSyncService.get_or_create_accounts(db, ["Old.1111", "New.2222"])
+    db.commit()
+    assert account_ids["Old.1111"] == existing_id
+
+    assert RosterSyncService.get_or_create_accounts(db, ["Old.1111", "New.2222"]) == account_ids
+    db.commit()
+    assert row_counts(db) == {"accounts": 2, "account_name_history": 2, "guild_standings": 2}
+
+
+def test_an_account_created_concurrently_gets_no_second_history_or_standing(db, monkeypatch):
+    existing_id = add_account(db, "Raced.1111")
+    lookup = RosterSyncService._account_ids_by_name
+    calls = []
+
+    def stale_first_lookup(db, names):
+        # The first lookup ran before the other writer committed
+        calls.append(names)
+        return {} if len(calls) == 1 else lookup(db, names)
+
+    monkeypatch.setattr(RosterSyncService, "_account_ids_by_name", staticmethod(stale_first_lookup))
+    account_ids = RosterSyncService.get_or_create_accounts(db, ["Raced.1111", "Fresh.2222"])
+    db.commit()
+
+    assert account_ids["Raced.1111"] == existing_id
+    assert row_counts(db) == {"accounts": 2, "account_name_history": 2, "guild_standings": 2}
+
+
+def member(name, rank="Member", joined="2024-01-01T12:00:00Z", wvw_member=False):
+    return {"name": name, "rank": rank, "joined": joined, "wvw_member": wvw_member}
+
+
+def memberships(db, guild_id=GUILD_ID):
+    """The guild's membership rows as {account name: (rank, joined, wvw_member)}"""
+    rows = db.query(
+        Account.current_account_name, guild_memberships.c.rank, guild_memberships.c.joined, guild_memberships.c.wvw_member
+    ).join(Account, Account.id == guild_memberships.c.account_id).filter(guild_memberships.c.guild_id == guild_id)
+    return {name: (rank, joined, bool(wvw_member)) for name, rank, joined, wvw_member in rows}
+
+
+@pytest.fixture
+def guild_db(db):
+    db.add_all([Guild(id=GUILD_ID, name="Test Guild", tag="TEST"), Guild(id="guild-2", name="Other Guild", tag="OTHR")])
+    db.commit()
+    return db
+
+
+def test_first_sync_adds_every_member(guild_db):
+    diff = RosterSyncService.sync_members(guild_db, GUILD_ID, [member("One.1111"), member("Two.2222", rank="Officer")])
+    guild_db.commit()
+
+    assert diff.to_dict() == {"added": ["One.1111", "Two.2222"], "removed": [], "changed": []}
+    assert memberships(guild_db) == {
+        "One.1111": ("Member", datetime(2024, 1, 1, 12), False),
+        "Two.2222": ("Officer", datetime(2024, 1, 1, 12), False),
+    }
+
+
+def test_an_unchanged_roster_writes_nothing(guild_db, engine):
+    roster = [member("One.1111"), member("Two.2222", wvw_member=True)]
+    RosterSyncService.sync_members(guild_db, GUILD_ID, roster)
+    guild_db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    assert not RosterSyncService.sync_members(guild_db, GUILD_ID, roster)
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+
+
+def test_diffs_added_changed_and_removed_members(guild_db):
+    RosterSyncService.sync_members(guild_db, GUILD_ID, [member("Stays.1111"), member("Promoted.2222"), member("Leaves.3333")])
+    guild_db.commit()
+
+    diff = RosterSyncService.sync_members(guild_db, GUILD_ID, [
+        member("Stays.1111"),
+        member("Promoted.2222", rank="Officer"),
+        member("Joins.4444"),
+    ])
+    guild_db.commit()
+
+    assert diff.to_dict() == {"added": ["Joins.4444"], "removed": ["Leaves.3333"], "changed": ["Promoted.2222"]}
+    assert memberships(guild_db) == {
+        "Stays.1111": ("Member", datetime(2024, 1, 1, 12), False),
+        "Promoted.2222": ("Officer", datetime(2024, 1, 1, 12), False),
+        "Joins.4444": ("Member", datetime(2024, 1, 1, 12), False),
+    }
+
+
+def test_departed_members_lose_only_that_membership(guild_db):
+    RosterSyncService.sync_members(guild_db, GUILD_ID, [member("Both.1111"), member("Stays.2222")])
+    RosterSyncService.sync_members(guild_db, "guild-2", [member("Both.1111")])
+    guild_db.commit()
+
+    diff = RosterSyncService.sync_members(guild_db, GUILD_ID, [member("Stays.2222")])
+    guild_db.commit()
+
+    assert diff.removed == ["Both.1111"]
+    assert set(memberships(guild_db)) == {"Stays.2222"}
+    assert set(memberships(guild_db, "guild-2")) == {"Both.1111"}
+    # The account itself, with its history and standing, is kept
+    assert row_counts(guild_db) == {"accounts": 2, "account_name_history": 2, "guild_standings": 2}
+
+
+def test_an_empty_roster_removes_everyone(guild_db, monkeypatch):
+    monkeypatch.setattr("app.services.roster_sync.DB_IN_CHUNK", 2)
+    names = [f"Member.{n:04d}" for n in range(5)]
+    RosterSyncService.sync_members(guild_db, GUILD_ID, [member(name) for name in names])
+    guild_db.commit()
+
+    diff = RosterSyncService.sync_members(guild_db, GUILD_ID, [])
+    guild_db.commit()
+
+    assert sorted(diff.removed) == names
+    assert memberships(guild_db) == {}